@@ -0,0 +1,136 @@
+"""Aggregates over collected responses for the admin tab
+
+ResponseAggregates keeps running NumPy histograms, sums and daily counts
+that are folded forward one batch of new rows at a time. ResponseSnapshot
+pulls only the rows added since its last refresh from storage, at most once
+every REFRESH_SECONDS however many admins are watching, so a rerun never
+rescans every response.
+"""
+import os
+import threading
+import time
+
+import numpy as np
+import streamlit as st
+
+from storage import SCORE_COLUMNS
+
+TRAITS = ["D", "I", "S", "C"]
+KINDS = ["most", "least", "comp"]
+# MOST and LEAST run 0..24 and COMPOSITE -24..24; one offset covers all three
+MAX_SCORE = 24
+DOMINANT_LABELS = TRAITS + ["Tie"]
+REFRESH_SECONDS = int(os.getenv("ANALYTICS_REFRESH_SECONDS", "30"))
+
+
+def score_table(records):
+    """(N, 3, 4) int array of MOST/LEAST/COMPOSITE scores and (N,) submission days
+
+    Rows with a missing or non-numeric score or timestamp are skipped.
+    """
+    rows, days = [], []
+    for record in records:
+        try:
+            scores = [int(record[col]) for col in SCORE_COLUMNS]
+            day = np.datetime64(str(record["submitted_at"])[:10], "D")
+        except (KeyError, TypeError, ValueError):
+            continue
+        rows.append(scores)
+        days.append(day)
+    scores = np.array(rows, dtype=np.int64).reshape(-1, len(KINDS), len(TRAITS))
+    return np.clip(scores, -MAX_SCORE, MAX_SCORE), np.array(days, dtype="datetime64[D]")
+
+
+class ResponseAggregates:
+    """Running totals over every response seen so far"""
+
+    def __init__(self):
+        self.count = 0
+        # histograms[kind, trait, score + MAX_SCORE] = respondents with that score
+        self.histograms = np.zeros((len(KINDS), len(TRAITS), 2 * MAX_SCORE + 1), dtype=np.int64)
+        self.sums = np.zeros((len(KINDS), len(TRAITS)), dtype=np.int64)
+        self.dominant = np.zeros(len(DOMINANT_LABELS), dtype=np.int64)
+        self.daily = {}
+
+    def update(self, records):
+        """Fold a batch of new records into the totals"""
+        scores, days = score_table(records)
+        n = len(scores)
+        if not n:
+            return 0
+        kind_idx, trait_idx = np.meshgrid(np.arange(len(KINDS)), np.arange(len(TRAITS)), indexing="ij")
+        np.add.at(self.histograms, (kind_idx, trait_idx, scores + MAX_SCORE), 1)
+        self.sums += scores.sum(axis=0)
+
+        # Dominant factor = highest COMPOSITE; a shared maximum counts as a tie
+        comp = scores[:, KINDS.index("comp"), :]
+        is_max = comp == comp.max(axis=1, keepdims=True)
+        dominant = np.where(is_max.sum(axis=1) == 1, comp.argmax(axis=1), len(TRAITS))
+        self.dominant += np.bincount(dominant, minlength=len(DOMINANT_LABELS))
+
+        unique_days, day_counts = np.unique(days, return_counts=True)
+        for day, day_count in zip(unique_days, day_counts):
+            self.daily[day] = self.daily.get(day, 0) + int(day_count)
+        self.count += n
+        return n
+
+    def distribution(self, kind):
+        """(score values, (values, 4) counts) for one kind, trimmed to the scores seen"""
+        hist = self.histograms[KINDS.index(kind)].T
+        seen = np.flatnonzero(hist.any(axis=1))
+        if not len(seen):
+            return np.zeros(0, dtype=np.int64), np.zeros((0, len(TRAITS)), dtype=np.int64)
+        span = slice(seen[0], seen[-1] + 1)
+        return np.arange(-MAX_SCORE, MAX_SCORE + 1)[span], hist[span].copy()
+
+    def means(self):
+        """(3, 4) mean score per kind and trait"""
+        return self.sums / self.count if self.count else np.zeros_like(self.sums, dtype=float)
+
+    def timeline(self):
+        """(days, submissions per day), oldest first"""
+        days = np.array(sorted(self.daily), dtype="datetime64[D]")
+        return days, np.array([self.daily[d] for d in days], dtype=np.int64)
+
+
+class ResponseSnapshot:
+    """Process-wide ResponseAggregates kept current from storage by cursor"""
+
+    def __init__(self, storage, refresh_seconds=REFRESH_SECONDS):
+        self.storage = storage
+        self.refresh_seconds = refresh_seconds
+        self.aggregates = ResponseAggregates()
+        self.lock = threading.Lock()
+        self._cursor = 0
+        self._refreshed = None
+
+    def refresh(self, force=False):
+        """Fold in rows added since the last refresh; returns how many were new"""
+        with self.lock:
+            if not force and self._refreshed and time.monotonic() - self._refreshed < self.refresh_seconds:
+                return 0
+            records, self._cursor = self.storage.records_since(self._cursor)
+            self._refreshed = time.monotonic()
+            return self.aggregates.update(records)
+
+    def view(self):
+        """Copies of the current aggregates, consistent with each other"""
+        with self.lock:
+            agg = self.aggregates
+            days, daily = agg.timeline()
+            return {
+                "count": agg.count,
+                "distributions": {kind: agg.distribution(kind) for kind in KINDS},
+                "means": agg.means(),
+                "dominant": agg.dominant.copy(),
+                "days": days,
+                "daily": daily,
+                "refreshed_ago": None if self._refreshed is None else time.monotonic() - self._refreshed,
+            }
+
+
+@st.cache_resource
+def get_snapshot():
+    """Shared ResponseSnapshot over the app's storage for the whole Streamlit process"""
+    from storage import get_storage
+    return ResponseSnapshot(get_storage())
@@ -1,680 +1,225 @@
 import os
-import io
-import json
-import numpy as np
-import matplotlib.pyplot as plt
 import streamlit as st
 from dotenv import load_dotenv
-import gspread
-from google.oauth2.service_account import Credentials
-from datetime import datetime, timedelta, timezone
-import smtplib
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from email.mime.image import MIMEImage
-from PIL import Image, ImageDraw, ImageFont
+import metrics
+import hmac
+from runtime import has_secret, load_subsystem
+# Charts, storage, Google Sheets, email, images and analytics are imported on first use via load_subsystem
+from scoring import questions, QUESTION_MODEL, encode_responses, score_batch, scores_dict, answer_traits
 
 # ---------- Load environment variables ----------
 load_dotenv()
 
-# ---------- Initialize Google Sheets ----------
-SHEET_ID = "1uHj7lwx-6vsWu48hn9vT-c3a3WW4GAhOsZDo4cbjoY8"
+# Serve Prometheus metrics at /metrics when METRICS_PORT is set (once per process)
+metrics.start_server(os.getenv("METRICS_PORT"))
 
-def get_gsheet():
-    """Connect to Google Sheet - works with both local files and Streamlit secrets"""
+# ---------- Saving responses ----------
+def save_response(data):
+    """Save response data to the configured storage - returns once it is stored locally"""
     try:
-        scope = [
-            'https://www.googleapis.com/auth/spreadsheets',
-            'https://www.googleapis.com/auth/drive'
-        ]
-        
-        # Try Streamlit secrets first (for cloud deployment)
-        if hasattr(st, 'secrets') and 'gcp_service_account' in st.secrets:
-            creds_dict = dict(st.secrets['gcp_service_account'])
-            creds = Credentials.from_service_account_info(creds_dict, scopes=scope)
-        # Try credentials.json file (for local development)
-        elif os.path.exists('credentials.json'):
-            creds = Credentials.from_service_account_file('credentials.json', scopes=scope)
-        else:
-            st.error("❌ No Google Sheets credentials found.")
-            return None
-            
-        client = gspread.authorize(creds)
-        sheet = client.open_by_key(SHEET_ID).sheet1
-        return sheet
-    except Exception as e:
-        st.error(f"❌ Could not connect to Google Sheets: {str(e)}")
-        return None
-
-def append_to_sheet(data):
-    """Append response data to Google Sheet"""
-    try:
-        sheet = get_gsheet()
-        if sheet is None:
-            return False
-        # Get current time in Malaysia Time (MYT, UTC+8)
-        myt = timezone(timedelta(hours=8))
-        timestamp = datetime.now(myt).strftime("%Y-%m-%d %H:%M:%S")
-        row = [
-            timestamp,
-            data["name"],
-            data["email"],
-            data.get("phone", ""),
-            data["most_d"],
-            data["most_i"],
-            data["most_s"],
-            data["most_c"],
-            data["least_d"],
-            data["least_i"],
-            data["least_s"],
-            data["least_c"],
-            data["comp_d"],
-            data["comp_i"],
-            data["comp_s"],
-            data["comp_c"]
-        ]
-        
-        # Add individual question responses (MOST and LEAST for each of 24 questions)
-        for i in range(24):
-            row.append(data.get(f"q{i+1}_most", ""))
-            row.append(data.get(f"q{i+1}_least", ""))
-        
-        sheet.append_row(row)
+        storage = load_subsystem("storage")
+        with metrics.span("save"):
+            storage.get_storage().append(storage.make_record(data))
         return True
     except Exception as e:
-        # Silently fail if sheets save doesn't work
+        st.error(f"❌ Could not save your response: {str(e)}")
         return False
 
-# ---------- Chart generation ----------
-disc_config = {
-    "MOST": {
-        "grey_zones": [
-            (0.00, 0.231, "#e0e0e0"),  # light top (90% of white zone)
-            (0.488, 0.533, "#bfbfbf"),  # dark upper mid (35% of white zone)
-            (0.533, 0.578, "#bfbfbf"),  # dark lower mid (35% of white zone)
-            (0.835, 1.00, "#e0e0e0"),  # light bottom (64% of white zone)
-        ],
-        "coords": {
-            "D": {
-                17: 0.03,
-                16: 0.05,
-                15: 0.07,
-                14: 0.14,
-                12: 0.235,
-                11: 0.27,
-                10: 0.32,
-                9: 0.34,
-                8: 0.38,
-                7: 0.42,
-                6: 0.46,
-                5: 0.485,
-                4: 0.515,
-                3: 0.545,
-                2: 0.58,
-                1: 0.665,
-                0: 0.775
-                },
-
-            "I": {
-                17: 0.07,
-                16: 0.1,
-                15: 0.14,
-                13: 0.21,
-                12: 0.235,
-                11: 0.32,
-                10: 0.35,
-                9: 0.375,
-                8: 0.42,
-                7: 0.47,
-                6: 0.49,
-                5: 0.51,
-                4: 0.53,
-                3: 0.55,
-                2: 0.59,
-                1: 0.675,
-                0: 0.80
-            },
-
-            "S": {
-                17: 0.07,
-                16: 0.21,
-                15: 0.27,
-                14: 0.325,
-                13: 0.37,
-                12: 0.4,
-                11: 0.445,
-                10: 0.48,
-                9: 0.505,
-                8: 0.525,
-                7: 0.545,
-                6: 0.56,
-                5: 0.58,
-                4: 0.625,
-                3: 0.68,
-                2: 0.74,
-                1: 0.79,
-                0: 0.865
-
-            },
-
-
-            "C": {
-                14:  0.07,
-                13: 0.1,
-                12: 0.14,
-                11: 0.3,
-                10: 0.34,
-                9: 0.38,
-                8: 0.44,
-                7: 0.475,
-                6: 0.515,
-                5: 0.545,
-                4: 0.56,
-                3: 0.645,
-                2: 0.72,
-                1: 0.775,
-                0: 0.92
-
-            },
-        },
-        "offsets": {"D":0.0,"I":0.0,"S":0.0,"C":0.0},
-    },
-
-    "LEAST": {
-        "grey_zones": [
-            (0.00, 0.231, "#e0e0e0"),  # light top (90% of white zone)
-            (0.488, 0.533, "#bfbfbf"),  # dark upper mid (35% of white zone)
-            (0.533, 0.578, "#bfbfbf"),  # dark lower mid (35% of white zone)
-            (0.835, 1.00, "#e0e0e0"),  # light bottom (64% of white zone)
-        ],
-        "coords": {
-            "D": {
-                0: 0.07,
-                1: 0.12,
-                2: 0.27,
-                3: 0.33,
-                4: 0.38,
-                5: 0.43,
-                6: 0.46,
-                7: 0.49,
-                8: 0.51,
-                9: 0.53,
-                10: 0.54,
-                11: 0.56,
-                12: 0.58,
-                13: 0.63,
-                14: 0.665,
-                15: 0.73,
-                16: 0.765,
-                17: 0.8,
-                18: 0.865,
-                19:0.96
-                },
-
-            "I": {
-                0: 0.07,
-                1: 0.235,
-                2: 0.34,
-                3: 0.43,
-                4: 0.48,
-                5: 0.52,
-                6: 0.54,
-                7: 0.595,
-                8: 0.645, 
-                9: 0.685,
-                10: 0.75,
-                11: 0.775,
-                12: 0.82,
-                13: 0.84,
-                14: 0.885,
-                16: 0.96
-
-            },
-
-            "S": {
-                0:  0.07,
-                1: 0.395,
-                2: 0.46,
-                3: 0.52,
-                4: 0.54,
-                5: 0.59,
-                6: 0.63,
-                7: 0.68,
-                8: 0.74,
-                9: 0.775,
-                10: 0.795,
-                11: 0.82,
-                12: 0.885,
-                14: 0.96
-            },
-
-
-            "C": {
-                0:  0.07,
-                1: 0.27,
-                2: 0.395,
-                3: 0.46,
-                4: 0.49,
-                5: 0.52,
-                6: 0.54,
-                7: 0.56,
-                8: 0.575,
-                9: 0.62,
-                10: 0.68,
-                11: 0.75,
-                12: 0.775,
-                13: 0.825,
-                14: 0.855,
-                15: 0.92,
-                16: 0.96
-
-
-            },
-        },
-        "offsets": {"D":0.0,"I":0.0,"S":0.0,"C":0.0},
-    },
-
-    "COMPOSITE": {
-        "grey_zones": [
-            (0.00, 0.231, "#e0e0e0"),  # light top (90% of white zone)
-            (0.488, 0.533, "#bfbfbf"),  # dark upper mid (35% of white zone)
-            (0.533, 0.578, "#bfbfbf"),  # dark lower mid (35% of white zone)
-            (0.835, 1.00, "#e0e0e0"),  # light bottom (64% of white zone)
-        ],
-        "coords": {
-            "D": {
-                15: 0.04,
-                14: 0.09,
-                13: 0.115,
-                12: 0.21,
-                11: 0.235,
-                9: 0.27,
-                7: 0.33,
-                5: 0.36,
-                3: 0.40,
-                1: 0.43,
-                0: 0.46,
-                -1: 0.48,
-                -3: 0.50,
-                -5: 0.525,
-                -6: 0.54,
-                -8: 0.56,
-                -9: 0.58,
-                -11: 0.62,
-                -12: 0.65,
-                -13: 0.68,
-                -14: 0.72,
-                -15: 0.75,
-                -16: 0.8,
-                },
-
-            "I": {
-                18:  0.09,
-                16:  0.115,
-                14:  0.16,
-                12:  0.21,
-                11:  0.235,
-                9:  0.275,
-                8:  0.34,
-                7:  0.365,
-                6:  0.405,
-                4:  0.435,
-                2:  0.49,
-                0:  0.51,
-                -1:  0.53,
-                -3:  0.545,
-                -4:  0.57,
-                -5:  0.61,
-                -6:  0.635,
-                -7:  0.685,
-                -8:  0.735,
-                -9:  0.775,
-                -11:  0.81,
-                -12:  0.84,
-                -13:  0.89,
-                -14:  0.915,
-                -16:  0.96,
-            },
-
-            "S": {
-                17:  0.09,
-                16:  0.17,
-                15:  0.235,
-                14:  0.275,
-                13: 0.353,
-                12: 0.39,
-                10: 0.42,
-                9: 0.46,
-                7: 0.505,
-                5: 0.53,
-                3: 0.54,
-                1: 0.565,
-                0: 0.59,
-                -1: 0.615,
-                -2: 0.64,
-                -4: 0.67,
-                -5: 0.72,
-                -6: 0.745,
-                -8: 0.775,
-                -9: 0.81,
-                -10: 0.89,
-                -12: 0.915,
-                -13: 0.96
-            },
-
-
-            "C": {
-                13:  0.09,
-                12: 0.115,
-                11: 0.21,
-                10: 0.275,
-                9: 0.34,
-                8: 0.365,
-                7: 0.39,
-                6: 0.42,
-                5: 0.44,
-                4: 0.46,
-                3: 0.48,
-                2: 0.50,
-                1: 0.52,
-                0: 0.54,
-                -1: 0.56,
-                -3: 0.575,
-                -4: 0.60,
-                -5: 0.625,
-                -6: 0.65,
-                -7: 0.67,
-                -8: 0.72,
-                -9: 0.755,
-                -10: 0.775,
-                -11: 0.8,
-                -12: 0.84,
-                -13: 0.87,
-                -14: 0.92,
-                -15: 0.96
-            },
-        },
-        "offsets": {
-            "D": 0.0,
-            "I": 0.0,
-            "S": 0.0,
-            "C": 0.0,
-        },
-    }   
-}
-
-
-# -------------------------------------------------------
-# DRAW FUNCTION
-# -------------------------------------------------------
-def draw_disc_chart(most, least, comp, config):
-    def clamp(v, lo, hi): return max(lo, min(hi, v))
-
-    def grid_and_plot(ax, title, chart_type, values_dict):
-        cfg = config[chart_type]
-
-        # Draw grey zones
-        for lo, hi, color in cfg["grey_zones"]:
-            ax.axhspan(lo, hi, facecolor=color, alpha=1.0, zorder=0)
-
-        # Add light black line in the middle
-        ax.axhline(y=0.533, color="black", lw=1, alpha=0.4, zorder=1)
-
-        labels = ["D", "I", "S", "C"]
-        x = np.arange(len(labels))
-        ypos_map = {}
-
-        # Draw numbers for each column
-        for col_idx, col in enumerate(labels):
-            tick_map = cfg["coords"][col]
-            ypos_map[col] = tick_map
-            for v, y in tick_map.items():
-                ax.text(col_idx, y, f"{v}", color="black", fontsize=18,
-                        ha="center", va="center", zorder=1)
-
-        # Plot red values
-        xs, ys = [], []
-        for col_idx, col in enumerate(labels):
-            tick_map = ypos_map[col]
-            v_in = values_dict[col]
-            nearest = min(tick_map.keys(), key=lambda t: abs(t - v_in))
-            xs.append(col_idx)
-            ys.append(tick_map[nearest])
-
-        ax.plot(xs, ys, color="red", lw=2, zorder=3)
-        ax.scatter(xs, ys, color="red", s=50, zorder=4)
-        for col_idx, y in zip(xs, ys):
-            v = values_dict[labels[col_idx]]
-            ax.text(col_idx + 0.15, y, f"{v}", color="red", fontsize=10,
-                    fontweight="bold", ha="left", va="center", zorder=5)
-
-        ax.set_xticks(x)
-        ax.set_xticklabels(labels, fontsize=12, fontweight="bold")
-        ax.set_xlim(-0.5, len(labels) - 0.2)
-        ax.set_ylim(1, 0)
-        ax.set_yticks([])
-        ax.set_title(title, fontsize=12, fontweight="bold", pad=18)
-        for s in ax.spines.values():
-            s.set_linewidth(1.2)
-
-    # Create 3 charts
-    fig, axes = plt.subplots(1, 3, figsize=(12, 12))
-    plt.subplots_adjust(wspace=0.08)
-    fig.suptitle("DISC Graphs", fontsize=16, fontweight="bold")
-
-    grid_and_plot(axes[0], "MOST\n(Projected Concept)", "MOST", most)
-    grid_and_plot(axes[1], "LEAST\n(Private Concept)", "LEAST", least)
-    grid_and_plot(axes[2], "COMPOSITE\n(Public Concept)", "COMPOSITE", comp)
-
-    buf = io.BytesIO()
-    fig.savefig(buf, format="png", dpi=240, bbox_inches="tight")
-    plt.close(fig)
-    buf.seek(0)
-    return buf.getvalue()
-
-# ---------------------------------------------
-# Helper to visualize spacing tables
-# ---------------------------------------------
-
-# ---------- Google Sheets Integration ----------
-def save_to_google_sheet(data):
-    """Save form response data to Google Sheet including individual question responses"""
-    try:
-        # Get credentials from environment or service account file
-        scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-        
-        # Try to use service account credentials from environment variable
-        import json
-        creds_dict = None
-        
-        # Check if credentials are in environment variable
-        if os.getenv("GOOGLE_SHEETS_CREDENTIALS"):
-            creds_dict = json.loads(os.getenv("GOOGLE_SHEETS_CREDENTIALS"))
-            creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, scope)
-        else:
-            # Fall back to file-based credentials
-            creds = ServiceAccountCredentials.from_json_keyfile_name("service_account.json", scope)
-        
-        client = gspread.authorize(creds)
-        
-        # Open the specific Google Sheet by ID
-        sheet_id = "1uHj7lwx-6vsWu48hn9vT-c3a3WW4GAhOsZDo4cbjoY8"
-        spreadsheet = client.open_by_key(sheet_id)
-        worksheet = spreadsheet.sheet1  # Use first sheet
-        
-        # Prepare row data with timestamp
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        row_data = [
-            timestamp,
-            data.get("name", ""),
-            data.get("email", ""),
-            data.get("phone", ""),
-            data.get("most_d", 0),
-            data.get("most_i", 0),
-            data.get("most_s", 0),
-            data.get("most_c", 0),
-            data.get("least_d", 0),
-            data.get("least_i", 0),
-            data.get("least_s", 0),
-            data.get("least_c", 0),
-            data.get("comp_d", 0),
-            data.get("comp_i", 0),
-            data.get("comp_s", 0),
-            data.get("comp_c", 0),
-        ]
-        
-        # Add individual question responses (MOST and LEAST for each of 24 questions)
-        for i in range(24):
-            row_data.append(data.get(f"q{i+1}_most", ""))
-            row_data.append(data.get(f"q{i+1}_least", ""))
-        
-        # Append the row to the sheet
-        worksheet.append_row(row_data)
-        return True, "Data saved to Google Sheet successfully!"
-        
-    except Exception as e:
-        return False, f"Failed to save to Google Sheet: {str(e)}"
-
 
 # ---------- Email Sending Function ----------
-def create_scores_image(name, most_scores, least_scores, comp_scores):
-    """Create an image of the DISC scores table"""
-    # Create image
-    img_width = 800
-    img_height = 400
-    img = Image.new('RGB', (img_width, img_height), color='white')
-    draw = ImageDraw.Draw(img)
-    
-    # Try to use a nice font, fall back to default if not available
-    try:
-        title_font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 40)
-        header_font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 28)
-        score_font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 24)
-    except:
-        title_font = ImageFont.load_default()
-        header_font = ImageFont.load_default()
-        score_font = ImageFont.load_default()
-    
-    # Draw title
-    draw.text((50, 30), "Your DISC Scores", font=title_font, fill='black')
-    
-    # Column headers
-    y_pos = 120
-    draw.text((50, y_pos), "MOST (Projected)", font=header_font, fill='black')
-    draw.text((300, y_pos), "LEAST (Private)", font=header_font, fill='black')
-    draw.text((550, y_pos), "COMPOSITE (Public)", font=header_font, fill='black')
-    
-    # Draw scores
-    y_start = 180
-    spacing = 50
-    for i, letter in enumerate(['D', 'I', 'S', 'C']):
-        y = y_start + (i * spacing)
-        draw.text((50, y), f"{letter}: {most_scores[letter]}", font=score_font, fill='black')
-        draw.text((300, y), f"{letter}: {least_scores[letter]}", font=score_font, fill='black')
-        comp_val = comp_scores[letter]
-        draw.text((550, y), f"{letter}: {comp_val:+d}", font=score_font, fill='black')
-    
-    # Save to bytes
-    img_bytes = io.BytesIO()
-    img.save(img_bytes, format='PNG')
-    img_bytes.seek(0)
-    return img_bytes.getvalue()
-
-
 def send_email_with_results(recipient_email, name, most_scores, least_scores, comp_scores, chart_bytes):
-    """Send email with DISC scores and chart - works with both .env and Streamlit secrets"""
+    """Queue email with DISC scores and chart for background delivery
+
+    Returns (job_id, message); job_id is None if the email could not be queued.
+    """
     try:
-        # Get email credentials - try Streamlit secrets first, then environment variables
-        if hasattr(st, 'secrets') and 'SENDER_EMAIL' in st.secrets:
-            sender_email = st.secrets['SENDER_EMAIL']
-            sender_password = st.secrets['SENDER_PASSWORD']
-        else:
-            sender_email = os.getenv("SENDER_EMAIL")
-            sender_password = os.getenv("SENDER_PASSWORD")
+        mailer = load_subsystem("email")
+        sender_email, sender_password = mailer.load_email_credentials()
         
         if not sender_email or not sender_password:
-            return False, "Email credentials not configured"
+            return None, "Email credentials not configured"
         
-        # Create message
-        msg = MIMEMultipart()
-        msg['From'] = sender_email
-        msg['To'] = recipient_email
-        msg['Subject'] = f"Your DISC Assessment Results - {name}"
-        
-        # Email body (HTML format for better styling)
-        body = f"""
-<html>
-<body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-    <h2>Hello {name},</h2>
-    
-    <p>Thank you for completing the DISC Personality Assessment!</p>
-    
-    <p>Please find your results attached:</p>
-    <ol>
-        <li>Your DISC Scores Summary</li>
-        <li>Your Complete DISC Profile Chart</li>
-    </ol>
-    
-    <h3 style="margin-top: 30px;">Your scores are:</h3>
-    
-    <div style="margin: 20px 0;">
-        <p><strong>MOST (Projected Concept):</strong></p>
-        <ul style="list-style: none; padding-left: 20px;">
-            <li><strong>D:</strong> {most_scores['D']}</li>
-            <li><strong>I:</strong> {most_scores['I']}</li>
-            <li><strong>S:</strong> {most_scores['S']}</li>
-            <li><strong>C:</strong> {most_scores['C']}</li>
-        </ul>
-    </div>
-    
-    <div style="margin: 20px 0;">
-        <p><strong>LEAST (Private Concept):</strong></p>
-        <ul style="list-style: none; padding-left: 20px;">
-            <li><strong>D:</strong> {least_scores['D']}</li>
-            <li><strong>I:</strong> {least_scores['I']}</li>
-            <li><strong>S:</strong> {least_scores['S']}</li>
-            <li><strong>C:</strong> {least_scores['C']}</li>
-        </ul>
-    </div>
-    
-    <div style="margin: 20px 0;">
-        <p><strong>COMPOSITE (Public Concept):</strong></p>
-        <ul style="list-style: none; padding-left: 20px;">
-            <li><strong>D:</strong> {comp_scores['D']:+d}</li>
-            <li><strong>I:</strong> {comp_scores['I']:+d}</li>
-            <li><strong>S:</strong> {comp_scores['S']:+d}</li>
-            <li><strong>C:</strong> {comp_scores['C']:+d}</li>
-        </ul>
-    </div>
-    
-    <p style="margin-top: 30px;">Best regards,<br>
-    <strong>Mira!</strong></p>
-</body>
-</html>
-"""
-        msg.attach(MIMEText(body, 'html'))
+        reports = load_subsystem("images")
+        with metrics.span("scores_image"):
+            scores_img = reports.create_scores_image(name, most_scores, least_scores, comp_scores)
+        with metrics.span("email_build"):
+            msg = reports.build_results_message(
+                sender_email, recipient_email, name, most_scores, least_scores, comp_scores,
+                scores_img, chart_bytes
+            )
         
-        # Attach scores image
-        scores_img = create_scores_image(name, most_scores, least_scores, comp_scores)
-        scores_attachment = MIMEImage(scores_img)
-        scores_attachment.add_header('Content-Disposition', 'attachment', filename='disc_scores.png')
-        msg.attach(scores_attachment)
+        # Hand off to the delivery worker, which keeps one SMTP session open
+        with metrics.span("email_queue"):
+            job_id = mailer.get_email_outbox(sender_email, sender_password).submit(msg)
+        return job_id, "Email queued for delivery"
         
-        # Attach chart
-        chart_attachment = MIMEImage(chart_bytes)
-        chart_attachment.add_header('Content-Disposition', 'attachment', filename='disc_chart.png')
-        msg.attach(chart_attachment)
+    except Exception as e:
+        return None, f"Failed to send email: {str(e)}"
+
+
+def email_status(job_id):
+    """Where a results email is in the delivery outbox, or None once it has been forgotten"""
+    mailer = load_subsystem("email")
+    sender_email, sender_password = mailer.load_email_credentials()
+    return mailer.get_email_outbox(sender_email, sender_password).status(job_id)
+
+
+def render_email_status(status):
+    if status["state"] == "sent":
+        st.success(f"✅ Results sent to {status['to']}")
+    elif status["state"] == "failed":
+        st.warning(f"⚠️ Could not send email: {status['error']}")
+    elif status["state"] == "retrying":
+        st.info(f"📧 Retrying email to {status['to']} (attempt {status['attempts']})...")
+    else:
+        st.info(f"📧 Sending results to {status['to']}...")
+
+
+@st.fragment(run_every="2s")
+def poll_email_status(job_id):
+    """Poll the delivery worker until the email is sent or has failed"""
+    status = email_status(job_id)
+    if status is None or status["state"] in ("sent", "failed"):
+        # Rerun the page once so it shows the final state without this timer
+        st.rerun(scope="app")
+    render_email_status(status)
+
+
+def show_email_status(job_id):
+    """Where this session's results email is; polls only while delivery is in progress"""
+    status = email_status(job_id)
+    if status is None:
+        return
+    if status["state"] in ("sent", "failed"):
+        render_email_status(status)
+    else:
+        poll_email_status(job_id)
+
+
+# ---------- Submissions ----------
+def process_submission(data, most_scores, least_scores, comp_scores):
+    """Save, chart and email a submission exactly once per submission ID
+
+    Each step's outcome is recorded in the shared result cache as soon as it
+    finishes, so a duplicate click (or a rerun that interrupted the first one)
+    returns the cached result and only redoes steps that never completed.
+    """
+    storage = load_subsystem("storage")
+    submission_id = storage.submission_id(data)
+    results = storage.get_result_cache()
+    with results.lock(submission_id), metrics.span("submit", submission=submission_id[:12]):
+        result = results.get(submission_id)
+        if result is None:
+            result = {
+                "id": submission_id,
+                "name": data["name"],
+                "data": dict(data),
+                "most": dict(most_scores),
+                "least": dict(least_scores),
+                "comp": dict(comp_scores),
+            }
+            results.put(submission_id, result)
         
-        # Send email via Gmail SMTP
-        with smtplib.SMTP('smtp.gmail.com', 587) as server:
-            server.starttls()
-            server.login(sender_email, sender_password)
-            server.send_message(msg)
+        if not result.get("saved"):
+            # Save to storage (replicated to Google Sheets in the background)
+            result["saved"] = save_response(data)
         
-        return True, "Email sent successfully!"
+        if "chart" not in result:
+            # One render at attachment size, scaled down for the page preview; print only on request
+            charts = load_subsystem("charts")
+            with metrics.span("chart"):
+                images = charts.draw_disc_charts(
+                    most_scores, least_scores, comp_scores, charts.disc_config, ("email", "screen")
+                )
+            result["preview"], result["chart"] = images["screen"], images["email"]
         
-    except Exception as e:
-        return False, f"Failed to send email: {str(e)}"
+        if "email_job" not in result:
+            # Send email with results
+            email_job, email_message = send_email_with_results(
+                data["email"], data["name"], most_scores, least_scores, comp_scores, result["chart"]
+            )
+            result["email_message"] = email_message
+            result["email_job"] = email_job
+    return result
+
+
+def show_delivery(result):
+    """Email status for a submission result"""
+    if result["email_job"]:
+        show_email_status(result["email_job"])
+    else:
+        st.warning(f"⚠️ Could not send email: {result['email_message']}")
+
+
+def show_chart_downloads(result):
+    """Render the print-resolution and vector charts only when asked for, then offer them"""
+    if "print_chart" not in result:
+        if not st.button("🖨️ Prepare high-resolution chart", key=f"hires_{result['id']}"):
+            return
+        charts = load_subsystem("charts")
+        with metrics.span("chart_print"):
+            images = charts.draw_disc_charts(
+                result["most"], result["least"], result["comp"], charts.disc_config, ("print", "vector")
+            )
+            result["print_chart"], result["vector_chart"] = images["print"], images["vector"]
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button("⬇️ Chart (PNG)", result["print_chart"], file_name="disc_chart.png",
+                           mime="image/png", key=f"png_{result['id']}")
+    with col2:
+        st.download_button("⬇️ Chart (SVG)", result["vector_chart"], file_name="disc_chart.svg",
+                           mime="image/svg+xml", key=f"svg_{result['id']}")
+
+
+def load_admin_password():
+    """Admin tab password - try Streamlit secrets first, then environment variables"""
+    if has_secret('ADMIN_PASSWORD'):
+        return st.secrets['ADMIN_PASSWORD']
+    return os.getenv("ADMIN_PASSWORD")
+
+
+@st.fragment
+def show_admin_analytics():
+    """Score distributions, dominant factors and submissions per day across all responses"""
+    if not st.session_state.get("admin"):
+        password = st.text_input("Admin password", type="password", key="admin_password")
+        if not st.button("Unlock", key="admin_unlock"):
+            return
+        if not hmac.compare_digest(password.encode("utf-8"), ADMIN_PASSWORD.encode("utf-8")):
+            st.error("❌ Wrong password")
+            return
+        st.session_state.admin = True
+
+    import pandas as pd
+    analytics = load_subsystem("analytics")
+    snapshot = analytics.get_snapshot()
+    if st.button("🔄 Refresh", key="admin_refresh"):
+        snapshot.refresh(force=True)
+    else:
+        snapshot.refresh()
+    view = snapshot.view()
+
+    st.metric("Submissions", view["count"])
+    if not view["count"]:
+        st.info("No submissions yet.")
+        return
+    st.caption(f"Updated {view['refreshed_ago']:.0f}s ago")
+
+    st.markdown("#### Submissions per day")
+    st.bar_chart(pd.Series(view["daily"], index=pd.to_datetime(view["days"]), name="Submissions"))
+
+    st.markdown("#### Dominant factor (highest composite)")
+    st.bar_chart(pd.Series(view["dominant"], index=analytics.DOMINANT_LABELS, name="Respondents"))
+
+    st.markdown("#### Score distributions")
+    labels = {"most": "MOST", "least": "LEAST", "comp": "COMPOSITE"}
+    kind = st.radio("Scores", analytics.KINDS, format_func=labels.get, horizontal=True, key="admin_kind")
+    scores, counts = view["distributions"][kind]
+    st.bar_chart(pd.DataFrame(counts, index=scores, columns=analytics.TRAITS))
+
+    st.markdown("#### Mean scores")
+    st.dataframe(pd.DataFrame(view["means"].round(2), index=[labels[k] for k in analytics.KINDS],
+                              columns=analytics.TRAITS))
 
 
 # ---------- DISC Questions Mapping ----------
@@ -998,88 +543,56 @@ question_contexts = [
     }
 ]
 
-# Each option maps to D, I, S, or C
-questions = [
-    {"most": ["EXPRESSIVE", "COMPLIANT", "FORCEFUL", "RESTRAINED"], 
-     "least": ["EXPRESSIVE", "COMPLIANT", "FORCEFUL", "RESTRAINED"],
-     "mapping": ["I", "C", "D", "S"]},
-    {"most": ["STRONG MINDED", "CAREFUL", "EMOTIONAL", "SATISFIED"],
-     "least": ["STRONG MINDED", "CAREFUL", "EMOTIONAL", "SATISFIED"],
-     "mapping": ["D", "C", "I", "S"]},
-    {"most": ["CORRECT", "PIONEERING", "CALM", "INFLUENTIAL"],
-     "least": ["CORRECT", "PIONEERING", "CALM", "INFLUENTIAL"],
-     "mapping": ["C", "D", "S", "I"]},
-    {"most": ["PRECISE", "DOMINEERING", "WILLING", "ATTRACTIVE"],
-     "least": ["PRECISE", "DOMINEERING", "WILLING", "ATTRACTIVE"],
-     "mapping": ["C", "D", "S", "I"]},
-    {"most": ["EVEN-TEMPERED", "STIMULATING", "METICULOUS", "DETERMINED"],
-     "least": ["EVEN-TEMPERED", "STIMULATING", "METICULOUS", "DETERMINED"],
-     "mapping": ["S", "I", "C", "D"]},
-    {"most": ["TIMID", "DEMANDING", "PATIENT", "CAPTIVATING"],
-     "least": ["TIMID", "DEMANDING", "PATIENT", "CAPTIVATING"],
-     "mapping": ["C", "D", "S", "I"]},
-    {"most": ["CONSCIENTIOUS", "COMPANIONABLE", "KIND", "SELF-RELIANT"],
-     "least": ["CONSCIENTIOUS", "COMPANIONABLE", "KIND", "SELF-RELIANT"],
-     "mapping": ["C", "I", "S", "D"]},
-    {"most": ["AGREEABLE", "SELF-CONTROLLED", "PLAYFUL", "PERSISTENT"],
-     "least": ["AGREEABLE", "SELF-CONTROLLED", "PLAYFUL", "PERSISTENT"],
-     "mapping": ["C", "S", "I", "D"]},
-    {"most": ["HIGH-SPIRITED", "TALKATIVE", "GOOD-NATURED", "CONSERVATIVE"],
-     "least": ["HIGH-SPIRITED", "TALKATIVE", "GOOD-NATURED", "CONSERVATIVE"],
-     "mapping": ["D", "I", "S", "C"]},
-    {"most": ["CONTENTED", "IMPATIENT", "CONVINCING", "RESIGNED"],
-     "least": ["CONTENTED", "IMPATIENT", "CONVINCING", "RESIGNED"],
-     "mapping": ["S", "D", "I", "C"]},
-    {"most": ["RESPECTFUL", "GOOD MIXER", "AGGRESSIVE", "GENTLE"],
-     "least": ["RESPECTFUL", "GOOD MIXER", "AGGRESSIVE", "GENTLE"],
-     "mapping": ["C", "I", "D", "S"]},
-    {"most": ["POISED", "CONVENTIONAL", "TAKES RISKS", "ACCOMMODATING"],
-     "least": ["POISED", "CONVENTIONAL", "TAKES RISKS", "ACCOMMODATING"],
-     "mapping": ["I", "C", "D", "S"]},
-    {"most": ["CONFIDENT", "COOPERATIVE", "ARGUMENTATIVE", "RELAXED"],
-     "least": ["CONFIDENT", "COOPERATIVE", "ARGUMENTATIVE", "RELAXED"],
-     "mapping": ["I", "C", "D", "S"]},
-    {"most": ["RESTLESS", "WELL-DISCIPLINED", "INSPIRING", "CONSIDERATE"],
-     "least": ["RESTLESS", "WELL-DISCIPLINED", "INSPIRING", "CONSIDERATE"],
-     "mapping": ["D", "C", "I", "S"]},
-    {"most": ["DIPLOMATIC", "COURAGEOUS", "SYMPATHETIC", "OPTIMISTIC"],
-     "least": ["DIPLOMATIC", "COURAGEOUS", "SYMPATHETIC", "OPTIMISTIC"],
-     "mapping": ["C", "D", "S", "I"]},
-    {"most": ["CHARMING", "POSITIVE", "LENIENT", "EXACTING"],
-     "least": ["CHARMING", "POSITIVE", "LENIENT", "EXACTING"],
-     "mapping": ["I", "D", "S", "C"]},
-    {"most": ["ADVENTUROUS", "ENTHUSIASTIC", "GOES-BY-THE-BOOK", "LOYAL"],
-     "least": ["ADVENTUROUS", "ENTHUSIASTIC", "GOES-BY-THE-BOOK", "LOYAL"],
-     "mapping": ["D", "I", "C", "S"]},
-    {"most": ["HUMBLE", "GOOD LISTENER", "ENTERTAINING", "WILL POWER"],
-     "least": ["HUMBLE", "GOOD LISTENER", "ENTERTAINING", "WILL POWER"],
-     "mapping": ["C", "S", "I", "D"]},
-    {"most": ["FUN-LOVING", "OBEDIENT", "TACTFUL", "COMPETITIVE"],
-     "least": ["FUN-LOVING", "OBEDIENT", "TACTFUL", "COMPETITIVE"],
-     "mapping": ["I", "S", "C", "D"]},
-    {"most": ["CAUTIOUS", "NEIGHBORLY", "VIGOROUS", "PERSUASIVE"],
-     "least": ["CAUTIOUS", "NEIGHBORLY", "VIGOROUS", "PERSUASIVE"],
-     "mapping": ["C", "S", "D", "I"]},
-    {"most": ["RESERVED", "OUTSPOKEN", "STRICT", "ELOQUENT"],
-     "least": ["RESERVED", "OUTSPOKEN", "STRICT", "ELOQUENT"],
-     "mapping": ["S", "D", "C", "I"]},
-    {"most": ["OBLIGING", "ANIMATED", "DECISIVE", "ACCURATE"],
-     "least": ["OBLIGING", "ANIMATED", "DECISIVE", "ACCURATE"],
-     "mapping": ["S", "I", "D", "C"]},
-    {"most": ["ASSERTIVE", "SOCIABLE", "STEADY", "ORDERLY"],
-     "least": ["ASSERTIVE", "SOCIABLE", "STEADY", "ORDERLY"],
-     "mapping": ["D", "I", "S", "C"]},
-    {"most": ["OUTGOING", "BOLD", "MODERATE", "PERFECTIONIST"],
-     "least": ["OUTGOING", "BOLD", "MODERATE", "PERFECTIONIST"],
-     "mapping": ["I", "D", "S", "C"]}
-]
-
 # ---------- Streamlit page setup ----------
+# Questions shown per step of the questionnaire; 0 shows all of them on one page
+QUESTIONS_PER_PAGE = int(os.getenv("QUESTIONS_PER_PAGE", "0"))
+
+# Styles for the fixed progress bar, injected once per page rather than with every update
+PROGRESS_CSS = """
+<style>
+.fixed-progress {
+    position: fixed;
+    top: 60px;
+    left: 0;
+    right: 0;
+    background-color: white;
+    z-index: 999;
+    padding: 1rem;
+    border-bottom: 2px solid #f0f2f6;
+    box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+}
+.progress-text {
+    font-weight: 600;
+    margin-bottom: 0.5rem;
+    color: #262730;
+    font-size: 14px;
+}
+.progress-bar-container {
+    width: 100%;
+    height: 10px;
+    background-color: #f0f2f6;
+    border-radius: 5px;
+    overflow: hidden;
+}
+.progress-bar-fill {
+    height: 100%;
+    background: linear-gradient(90deg, #1f77b4 0%, #4a9eff 100%);
+    transition: width 0.3s ease;
+    border-radius: 5px;
+}
+.spacer {
+    height: 80px;
+}
+</style>
+"""
+
 st.set_page_config(page_title="DISC Assessment", page_icon="🧭", layout="centered")
 st.title("🧭 DISC Personality Assessment")
 
-# Create tabs
-tab1, tab2 = st.tabs(["📋 Questionnaire", "✍️ Manual Input"])
+# Create tabs; the admin tab only exists once an admin password is configured
+ADMIN_PASSWORD = load_admin_password()
+tab_labels = ["📋 Questionnaire", "✍️ Manual Input"] + (["📊 Admin"] if ADMIN_PASSWORD else [])
+tab1, tab2, *admin_tab = st.tabs(tab_labels)
 
 # ---------- TAB 1: QUESTIONNAIRE ----------
 with tab1:
@@ -1107,6 +620,7 @@ with tab1:
             if 'saved_most' in st.session_state and 'saved_least' in st.session_state:
                 st.session_state.most_responses = st.session_state.saved_most.copy()
                 st.session_state.least_responses = st.session_state.saved_least.copy()
+                st.session_state.pop("completed_questions", None)
                 st.success("✅ Saved responses loaded! Please scroll down to see them.")
                 st.rerun()
             else:
@@ -1115,6 +629,9 @@ with tab1:
         if st.button("Clear All Responses"):
             st.session_state.most_responses = [None] * 24
             st.session_state.least_responses = [None] * 24
+            st.session_state.question_page = 0
+            st.session_state.pop("completed_questions", None)
+            st.session_state.pop("questionnaire_result", None)
             st.success("✅ All responses cleared!")
             st.rerun()
     
@@ -1125,79 +642,67 @@ with tab1:
         st.session_state.most_responses = [None] * 24
     if 'least_responses' not in st.session_state:
         st.session_state.least_responses = [None] * 24
+    if 'question_page' not in st.session_state:
+        st.session_state.question_page = 0
+    # Count of fully answered questions, kept up to date by record_answer
+    if 'completed_questions' not in st.session_state:
+        st.session_state.completed_questions = sum(
+            1 for m, l in zip(st.session_state.most_responses, st.session_state.least_responses)
+            if m is not None and l is not None
+        )
+    
+    def is_answered(question_idx):
+        return (st.session_state.most_responses[question_idx] is not None
+                and st.session_state.least_responses[question_idx] is not None)
+    
+    def record_answer(kind, question_idx, choice):
+        """Store a MOST or LEAST answer and adjust the completed counter"""
+        was_answered = is_answered(question_idx)
+        st.session_state[f"{kind}_responses"][question_idx] = choice
+        st.session_state.completed_questions += is_answered(question_idx) - was_answered
     
     # Callback function to update responses immediately
     def update_most_response(question_idx):
         def callback():
             widget_key = f"most_{question_idx}"
             if widget_key in st.session_state:
-                st.session_state.most_responses[question_idx] = st.session_state[widget_key]
+                record_answer("most", question_idx, st.session_state[widget_key])
         return callback
     
     def update_least_response(question_idx):
         def callback():
             widget_key = f"least_{question_idx}"
             if widget_key in st.session_state:
-                st.session_state.least_responses[question_idx] = st.session_state[widget_key]
+                record_answer("least", question_idx, st.session_state[widget_key])
         return callback
     
-    # Calculate progress
-    completed_questions = sum(1 for i in range(24) 
-                            if st.session_state.most_responses[i] is not None 
-                            and st.session_state.least_responses[i] is not None)
-    progress_percent = completed_questions / 24
+    # Answering a question only reruns that question's fragment; the page (and
+    # with it this progress bar) reruns only when the completed count changes
+    def show_progress():
+        completed_questions = st.session_state.completed_questions
+        st.session_state.progress_shown = completed_questions
+        progress_percent = completed_questions / len(questions)
     
-    # Add fixed progress bar at top using custom CSS
-    st.markdown(
-        f"""
-        <style>
-        .fixed-progress {{
-            position: fixed;
-            top: 60px;
-            left: 0;
-            right: 0;
-            background-color: white;
-            z-index: 999;
-            padding: 1rem;
-            border-bottom: 2px solid #f0f2f6;
-            box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-        }}
-        .progress-text {{
-            font-weight: 600;
-            margin-bottom: 0.5rem;
-            color: #262730;
-            font-size: 14px;
-        }}
-        .progress-bar-container {{
-            width: 100%;
-            height: 10px;
-            background-color: #f0f2f6;
-            border-radius: 5px;
-            overflow: hidden;
-        }}
-        .progress-bar-fill {{
-            height: 100%;
-            background: linear-gradient(90deg, #1f77b4 0%, #4a9eff 100%);
-            transition: width 0.3s ease;
-            border-radius: 5px;
-        }}
-        .spacer {{
-            height: 80px;
-        }}
-        </style>
-        <div class="fixed-progress">
-            <div class="progress-text">📝 Progress: {completed_questions}/24 questions completed ({int(progress_percent * 100)}%)</div>
-            <div class="progress-bar-container">
-                <div class="progress-bar-fill" style="width: {progress_percent * 100}%"></div>
+        # Fixed progress bar at top, styled by PROGRESS_CSS
+        st.markdown(
+            f"""
+            <div class="fixed-progress">
+                <div class="progress-text">📝 Progress: {completed_questions}/24 questions completed ({int(progress_percent * 100)}%)</div>
+                <div class="progress-bar-container">
+                    <div class="progress-bar-fill" style="width: {progress_percent * 100}%"></div>
+                </div>
             </div>
-        </div>
-        <div class="spacer"></div>
-        """,
-        unsafe_allow_html=True
-    )
+            <div class="spacer"></div>
+            """,
+            unsafe_allow_html=True
+        )
+    
+    st.markdown(PROGRESS_CSS, unsafe_allow_html=True)
+    show_progress()
     
-    # Display all questions
-    for i, q in enumerate(questions):
+    # Each question is its own fragment: a click reruns just that question
+    @st.fragment
+    def show_question(i, q):
         st.markdown(f"### Question {i+1}")
         
         # Get the context for this question
@@ -1224,10 +729,9 @@ with tab1:
         
         with col1:
             st.markdown("**MOST like you**")
-            # Filter out the current LEAST choice from MOST options
-            available_most = [opt for opt in q["most"] if opt != current_least] if current_least else q["most"]
-            # Find the index of the saved choice if it exists in available options
-            most_index = available_most.index(current_most) if current_most and current_most in available_most else None
+            # MOST options without the current LEAST choice, and the saved choice's position
+            available_most, most_positions = q.most_choices[current_least]
+            most_index = most_positions.get(current_most)
             most_choice = st.radio(
                 f"Select one:",
                 options=available_most,
@@ -1236,17 +740,16 @@ with tab1:
                 on_change=update_most_response(i)
             )
             # Update our tracking array
-            if most_choice:
-                st.session_state.most_responses[i] = most_choice
+            if most_choice and most_choice != st.session_state.most_responses[i]:
+                record_answer("most", i, most_choice)
         
         with col2:
             st.markdown("**LEAST like you**")
             # Get the updated MOST choice from widget
             updated_most = st.session_state.get(most_widget_key) or current_most
-            # Filter out the current MOST choice from LEAST options
-            available_least = [opt for opt in q["least"] if opt != updated_most] if updated_most else q["least"]
-            # Find the index of the saved choice if it exists in available options
-            least_index = available_least.index(current_least) if current_least and current_least in available_least else None
+            # LEAST options without the current MOST choice, and the saved choice's position
+            available_least, least_positions = q.least_choices[updated_most]
+            least_index = least_positions.get(current_least)
             least_choice = st.radio(
                 f"Select one: ",
                 options=available_least,
@@ -1255,13 +758,57 @@ with tab1:
                 on_change=update_least_response(i)
             )
             # Update our tracking array
-            if least_choice:
-                st.session_state.least_responses[i] = least_choice
+            if least_choice and least_choice != st.session_state.least_responses[i]:
+                record_answer("least", i, least_choice)
         
         st.markdown("---")
+        
+        # At most once per question answered (or un-answered): refresh the progress bar
+        if st.session_state.completed_questions != st.session_state.progress_shown:
+            st.rerun(scope="app")
+    
+    # Work out which questions to show
+    if QUESTIONS_PER_PAGE:
+        page_count = -(-len(questions) // QUESTIONS_PER_PAGE)
+        page = min(st.session_state.question_page, page_count - 1)
+        first = page * QUESTIONS_PER_PAGE
+        page_questions = range(first, min(first + QUESTIONS_PER_PAGE, len(questions)))
+    else:
+        page_count, page = 1, 0
+        page_questions = range(len(questions))
+    
+    # Callback to move between pages, checking the current page is complete first
+    def change_page(step):
+        def callback():
+            if step > 0:
+                unanswered = [i + 1 for i in page_questions
+                              if st.session_state.most_responses[i] is None
+                              or st.session_state.least_responses[i] is None]
+                if unanswered:
+                    st.session_state.page_error = (
+                        f"Please answer question(s) {', '.join(map(str, unanswered))} before continuing."
+                    )
+                    return
+            st.session_state.page_error = None
+            st.session_state.question_page = page + step
+        return callback
+    
+    # Display this page's questions
+    for i in page_questions:
+        show_question(i, QUESTION_MODEL[i])
     
-    # Calculate scores and submit
-    if st.button("Calculate My DISC Profile", type="primary", key="submit_questionnaire"):
+    if page_count > 1:
+        if st.session_state.get("page_error"):
+            st.error(st.session_state.page_error)
+        st.caption(f"Step {page + 1} of {page_count}")
+        nav_back, nav_next = st.columns(2)
+        with nav_back:
+            st.button("← Back", disabled=page == 0, on_click=change_page(-1), key="page_back")
+        with nav_next:
+            st.button("Next →", disabled=page == page_count - 1, on_click=change_page(1), key="page_next")
+    
+    # Calculate scores and submit (on the last page when paged)
+    if page == page_count - 1 and st.button("Calculate My DISC Profile", type="primary", key="submit_questionnaire"):
         # Validate all questions answered
         if None in st.session_state.most_responses or None in st.session_state.least_responses:
             st.error("Please answer all questions before submitting.")
@@ -1269,58 +816,14 @@ with tab1:
             st.error("Please fill in your name and email.")
         else:
             # Calculate DISC scores
-            most_scores = {"D": 0, "I": 0, "S": 0, "C": 0}
-            least_scores = {"D": 0, "I": 0, "S": 0, "C": 0}
-            
-            for i, q in enumerate(questions):
-                # Get the selected options
-                most_selected = st.session_state.most_responses[i]
-                least_selected = st.session_state.least_responses[i]
-                
-                # Find which index was selected
-                most_idx = q["most"].index(most_selected)
-                least_idx = q["least"].index(least_selected)
-                
-                # Map to DISC
-                most_trait = q["mapping"][most_idx]
-                least_trait = q["mapping"][least_idx]
-                
-                most_scores[most_trait] += 1
-                least_scores[least_trait] += 1
-            
-            # Calculate composite (MOST - LEAST)
-            comp_scores = {
-                "D": most_scores["D"] - least_scores["D"],
-                "I": most_scores["I"] - least_scores["I"],
-                "S": most_scores["S"] - least_scores["S"],
-                "C": most_scores["C"] - least_scores["C"]
-            }
-            
-            # Display scores
-            st.success("✅ Assessment completed!")
-            st.markdown("### Your DISC Scores")
-            
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.markdown("**MOST (Projected)**")
-                st.write(f"D: {most_scores['D']}")
-                st.write(f"I: {most_scores['I']}")
-                st.write(f"S: {most_scores['S']}")
-                st.write(f"C: {most_scores['C']}")
-            
-            with col2:
-                st.markdown("**LEAST (Private)**")
-                st.write(f"D: {least_scores['D']}")
-                st.write(f"I: {least_scores['I']}")
-                st.write(f"S: {least_scores['S']}")
-                st.write(f"C: {least_scores['C']}")
-            
-            with col3:
-                st.markdown("**COMPOSITE (Public)**")
-                st.write(f"D: {comp_scores['D']:+d}")
-                st.write(f"I: {comp_scores['I']:+d}")
-                st.write(f"S: {comp_scores['S']:+d}")
-                st.write(f"C: {comp_scores['C']:+d}")
+            with metrics.span("scoring"):
+                most_idx, least_idx = encode_responses(
+                    st.session_state.most_responses, st.session_state.least_responses
+                )
+                most_arr, least_arr, comp_arr = score_batch(most_idx, least_idx)
+            most_scores = scores_dict(most_arr[0])
+            least_scores = scores_dict(least_arr[0])
+            comp_scores = scores_dict(comp_arr[0])
             
             # Save to database
             data = {
@@ -1346,40 +849,64 @@ with tab1:
                 data[f"q{i+1}_most"] = st.session_state.most_responses[i]
                 data[f"q{i+1}_least"] = st.session_state.least_responses[i]
             
-            # Save to Google Sheets
-            append_to_sheet(data)
-            
-            # Generate chart
-            img_bytes = draw_disc_chart(most_scores, least_scores, comp_scores, disc_config)
-            
-            # Send email with results
-            email_success, email_message = send_email_with_results(
-                email, name, most_scores, least_scores, comp_scores, img_bytes
+            # Save, chart and email once; a repeated click gets the same result back
+            st.session_state.questionnaire_result = process_submission(
+                data, most_scores, least_scores, comp_scores
             )
-            if email_success:
-                st.success(f"✅ Results sent to {email}")
-            else:
-                st.warning(f"⚠️ Could not send email: {email_message}")
-            
-            st.image(img_bytes, caption=f"{name}'s DISC Profile Chart")
-            
-            # Show detailed breakdown for troubleshooting
-            with st.expander("📊 View Detailed Question Breakdown"):
-                st.markdown("### Question-by-Question DISC Mapping")
-                for i, q in enumerate(questions):
-                    most_selected = st.session_state.most_responses[i]
-                    least_selected = st.session_state.least_responses[i]
-                    
-                    most_idx = q["most"].index(most_selected)
-                    least_idx = q["least"].index(least_selected)
-                    
-                    most_trait = q["mapping"][most_idx]
-                    least_trait = q["mapping"][least_idx]
-                    
-                    st.markdown(f"**Question {i+1}:**")
-                    st.write(f"MOST: {most_selected} → **{most_trait}**")
-                    st.write(f"LEAST: {least_selected} → **{least_trait}**")
-                    st.markdown("---")
+    
+    # Results stay on screen across reruns until the next submission
+    result = st.session_state.get("questionnaire_result")
+    if result:
+        most_scores, least_scores, comp_scores = result["most"], result["least"], result["comp"]
+        
+        # Display scores
+        st.success("✅ Assessment completed!")
+        st.markdown("### Your DISC Scores")
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.markdown("**MOST (Projected)**")
+            st.write(f"D: {most_scores['D']}")
+            st.write(f"I: {most_scores['I']}")
+            st.write(f"S: {most_scores['S']}")
+            st.write(f"C: {most_scores['C']}")
+        
+        with col2:
+            st.markdown("**LEAST (Private)**")
+            st.write(f"D: {least_scores['D']}")
+            st.write(f"I: {least_scores['I']}")
+            st.write(f"S: {least_scores['S']}")
+            st.write(f"C: {least_scores['C']}")
+        
+        with col3:
+            st.markdown("**COMPOSITE (Public)**")
+            st.write(f"D: {comp_scores['D']:+d}")
+            st.write(f"I: {comp_scores['I']:+d}")
+            st.write(f"S: {comp_scores['S']:+d}")
+            st.write(f"C: {comp_scores['C']:+d}")
+        
+        show_delivery(result)
+        st.image(result["preview"], caption=f"{result['name']}'s DISC Profile Chart")
+        show_chart_downloads(result)
+        
+        # Show detailed breakdown for troubleshooting
+        with st.expander("📊 View Detailed Question Breakdown"):
+            st.markdown("### Question-by-Question DISC Mapping")
+            most_answers = [result["data"][f"q{i+1}_most"] for i in range(24)]
+            least_answers = [result["data"][f"q{i+1}_least"] for i in range(24)]
+            most_idx, least_idx = encode_responses(most_answers, least_answers)
+            most_traits = answer_traits(most_idx)
+            least_traits = answer_traits(least_idx)
+            for i, q in enumerate(questions):
+                most_selected = most_answers[i]
+                least_selected = least_answers[i]
+                most_trait = most_traits[i]
+                least_trait = least_traits[i]
+                
+                st.markdown(f"**Question {i+1}:**")
+                st.write(f"MOST: {most_selected} → **{most_trait}**")
+                st.write(f"LEAST: {least_selected} → **{least_trait}**")
+                st.markdown("---")
 
 # ---------- TAB 2: MANUAL INPUT ----------
 with tab2:
@@ -1433,22 +960,20 @@ with tab2:
                 "comp_c": int(comp_c)
             }
             
-            # Save to Google Sheets
-            append_to_sheet(data)
-            
             most = {"D": most_d, "I": most_i, "S": most_s, "C": most_c}
             least = {"D": least_d, "I": least_i, "S": least_s, "C": least_c}
             comp = {"D": comp_d, "I": comp_i, "S": comp_s, "C": comp_c}
             
-            img_bytes = draw_disc_chart(most, least, comp, disc_config)
-            
-            # Send email with results
-            email_success, email_message = send_email_with_results(
-                email_manual, name_manual, most, least, comp, img_bytes
-            )
-            if email_success:
-                st.success(f"✅ Results sent to {email_manual}")
-            else:
-                st.warning(f"⚠️ Could not send email: {email_message}")
-            
-            st.image(img_bytes, caption=f"{name_manual}'s DISC Chart")
+            # Save, chart and email once; a repeated click gets the same result back
+            st.session_state.manual_result = process_submission(data, most, least, comp)
+    
+    result = st.session_state.get("manual_result")
+    if result:
+        show_delivery(result)
+        st.image(result["preview"], caption=f"{result['name']}'s DISC Chart")
+        show_chart_downloads(result)
+
+# ---------- TAB 3: ADMIN ANALYTICS ----------
+if admin_tab:
+    with admin_tab[0]:
+        show_admin_analytics()
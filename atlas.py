@@ -0,0 +1,195 @@
+"""Pre-rendered chart atlas: draw the DISC graphs with Pillow only
+
+The grey zones, tick numbers, titles and frames of the three graphs never
+change for a given config, so an offline build step renders them once with
+matplotlib into a single PNG, together with the pixel geometry of each panel
+and the compiled tick tables (stored as JSON in a PNG text chunk). At request
+time the red line, markers and value labels are drawn onto a copy of that
+image, with no matplotlib involved.
+
+Build it with:
+
+    python atlas.py --output disc_atlas.png
+"""
+import argparse
+import io
+import json
+import os
+import threading
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont, PngImagePlugin
+
+LABELS = ["D", "I", "S", "C"]
+CHART_TYPES = ["MOST", "LEAST", "COMPOSITE"]
+DPI = 240
+RED = (255, 0, 0)
+# Match the matplotlib artists: lw=2pt line, s=50pt^2 markers, 10pt bold labels
+LINE_WIDTH = round(2 * DPI / 72)
+MARKER_RADIUS = round(50 ** 0.5 / 2 * DPI / 72)
+LABEL_SIZE = round(10 * DPI / 72)
+META_KEY = "disc_atlas"
+
+
+# ---------- Offline build ----------
+def build_atlas(config, output_path, placement=None):
+    """Render the static graphs for config and write the atlas PNG"""
+    import matplotlib
+    from matplotlib import _tight_bbox, font_manager
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    import charts
+
+    placement = placement or charts.TICK_PLACEMENT
+    fig = Figure(figsize=(12, 12), dpi=DPI)
+    canvas = FigureCanvasAgg(fig)
+    axes = fig.subplots(1, 3)
+    fig.subplots_adjust(wspace=0.08)
+    fig.suptitle("DISC Graphs", fontsize=16, fontweight="bold")
+    for ax, (title, chart_type) in zip(axes, charts.PANELS):
+        charts.draw_grid(ax, title, config[chart_type])
+
+    # Crop the figure exactly as savefig(bbox_inches="tight") and ChartTemplate do
+    renderer = canvas.get_renderer()
+    bbox = fig.get_tightbbox(renderer).padded(matplotlib.rcParams["savefig.pad_inches"])
+    _tight_bbox.adjust_bbox(fig, bbox, renderer)
+    canvas.draw()
+    width, height = canvas.get_width_height()
+    background = Image.frombuffer("RGBA", (width, height), canvas.buffer_rgba(), "raw", "RGBA", 0, 1).convert("RGB")
+
+    def to_pixels(ax, x, y):
+        px, py = ax.transData.transform((x, y))
+        return px, height - py
+
+    panels = {}
+    for ax, (_, chart_type) in zip(axes, charts.PANELS):
+        panels[chart_type] = {
+            "columns": [to_pixels(ax, col_idx, 0)[0] for col_idx in range(len(LABELS))],
+            "label_columns": [to_pixels(ax, col_idx + 0.15, 0)[0] for col_idx in range(len(LABELS))],
+            "y0": to_pixels(ax, 0, 0)[1],
+            "y1": to_pixels(ax, 0, 1)[1],
+        }
+
+    tick_tables = charts.get_tick_tables(config, placement)
+    meta = {
+        "config_digest": charts.config_digest(config),
+        "placement": placement,
+        "dpi": DPI,
+        "panels": panels,
+        "tables": {
+            chart_type: {"lo": int(lo), "table": table.tolist()}
+            for chart_type, (lo, table) in tick_tables.tables.items()
+        },
+        # The family, not a path: the atlas is built on one host and served from others
+        "font": font_manager.get_font(
+            font_manager.findfont(font_manager.FontProperties(weight="bold"))).family_name,
+    }
+    info = PngImagePlugin.PngInfo()
+    info.add_text(META_KEY, json.dumps(meta))
+    background.save(output_path, format="PNG", pnginfo=info, optimize=True)
+    return meta
+
+
+# ---------- Request-time rendering ----------
+def load_label_font(family):
+    """Bold TrueType font of this family as installed on this host, else Pillow's default"""
+    from matplotlib import font_manager
+
+    try:
+        path = font_manager.findfont(font_manager.FontProperties(family=family, weight="bold"))
+        return ImageFont.truetype(path, LABEL_SIZE)
+    except (OSError, ValueError):
+        return ImageFont.load_default()
+
+
+class ChartAtlas:
+    """Loaded atlas that draws a profile's red overlay with Pillow"""
+
+    def __init__(self, path):
+        with Image.open(path) as img:
+            img.load()
+            self.meta = json.loads(img.info[META_KEY])
+            self.background = img.convert("RGB")
+        self.dpi = self.meta.get("dpi", DPI)
+        self.tables = {
+            chart_type: (t["lo"], np.array(t["table"]))
+            for chart_type, t in self.meta["tables"].items()
+        }
+        self.font = load_label_font(self.meta.get("font"))
+
+    def matches(self, config_digest, placement):
+        return (self.meta["config_digest"] == config_digest
+                and self.meta["placement"] == placement)
+
+    def render(self, most, least, comp):
+        """Composite the red artists for these scores and return PNG bytes"""
+        buf = io.BytesIO()
+        self.render_image(most, least, comp).save(buf, format="PNG")
+        return buf.getvalue()
+
+    def render_image(self, most, least, comp):
+        """Composite the red artists for these scores onto a copy of the background"""
+        img = self.background.copy()
+        draw = ImageDraw.Draw(img)
+        anchor = "lm" if isinstance(self.font, ImageFont.FreeTypeFont) else None
+        for chart_type, values in zip(CHART_TYPES, (most, least, comp)):
+            panel = self.meta["panels"][chart_type]
+            lo, table = self.tables[chart_type]
+            scores = np.array([values[col] for col in LABELS])
+            rows = np.clip(np.rint(scores).astype(int) - lo, 0, len(table) - 1)
+            ys = table[rows, np.arange(len(LABELS))]
+            pys = panel["y0"] + (panel["y1"] - panel["y0"]) * ys
+            points = list(zip(panel["columns"], pys))
+
+            draw.line(points, fill=RED, width=LINE_WIDTH, joint="curve")
+            for x, y in points:
+                draw.ellipse((x - MARKER_RADIUS, y - MARKER_RADIUS,
+                              x + MARKER_RADIUS, y + MARKER_RADIUS), fill=RED)
+            for col_idx, (x, y) in enumerate(zip(panel["label_columns"], pys)):
+                draw.text((x, y), f"{values[LABELS[col_idx]]}", fill=RED,
+                          font=self.font, anchor=anchor)
+        return img
+
+
+_atlases = {}
+_atlases_lock = threading.Lock()
+
+
+def get_chart_atlas(path, config_digest, placement):
+    """The atlas at path if it exists and was built for this config, else None
+
+    Loaded atlases are kept per path and reloaded when the file changes, so an
+    atlas built or rebuilt while the app is running is picked up.
+    """
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    with _atlases_lock:
+        loaded_mtime, atlas = _atlases.get(path, (None, None))
+        if loaded_mtime != mtime:
+            try:
+                atlas = ChartAtlas(path)
+            except (OSError, KeyError, ValueError):
+                atlas = None
+            _atlases[path] = (mtime, atlas)
+    if atlas is None or not atlas.matches(config_digest, placement):
+        return None
+    return atlas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the pre-rendered DISC chart atlas")
+    parser.add_argument("--output", default="disc_atlas.png", help="atlas PNG to write")
+    parser.add_argument("--placement", choices=["nearest", "interpolate"],
+                        help="tick placement (defaults to CHART_TICK_PLACEMENT)")
+    args = parser.parse_args()
+
+    from charts import disc_config
+    meta = build_atlas(disc_config, args.output, args.placement)
+    print(f"Wrote {args.output} for config {meta['config_digest'][:12]} ({meta['placement']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Regenerate chart and scores images for a whole cohort
+
+Reads a CSV of scores - either with named columns (name, email, most_d ...
+comp_c) or a raw export of the response sheet - and writes each row's
+DISC chart and scores image into the output directory using a process
+pool (pyplot's global state rules out threads). Rows whose images already
+exist are skipped, so an interrupted run can simply be started again.
+
+    python batch_reports.py responses.csv --output reports --workers 8
+    python batch_reports.py responses.csv --profile vector   # SVG charts
+"""
+import argparse
+import csv
+import multiprocessing
+import os
+import re
+import time
+
+from storage import FIRST_SCORE_COL, SCORE_COLUMNS, is_header_row
+
+TRAITS = ["D", "I", "S", "C"]
+# Chart file extension per output profile (see charts.OUTPUT_PROFILES)
+PROFILE_EXTENSIONS = {"screen": "webp", "email": "png", "print": "png", "vector": "svg"}
+
+
+def read_score_rows(path):
+    """Rows of {"name", "email", "most", "least", "comp"} from a CSV of scores"""
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    if not rows:
+        return []
+    header = [h.strip().lower() for h in rows[0]]
+    if all(col in header for col in SCORE_COLUMNS):
+        positions = {col: header.index(col) for col in SCORE_COLUMNS}
+        name_col = header.index("name") if "name" in header else None
+        email_col = header.index("email") if "email" in header else None
+        body = rows[1:]
+    else:
+        # Raw sheet export: timestamp, name, email, phone, scores...
+        positions = {col: FIRST_SCORE_COL + i for i, col in enumerate(SCORE_COLUMNS)}
+        name_col, email_col = 1, 2
+        body = rows[1:] if is_header_row(rows[0]) else rows
+
+    parsed = []
+    for row in body:
+        if not any(cell.strip() for cell in row):
+            continue
+        scores = {col: int(row[pos]) for col, pos in positions.items()}
+        parsed.append({
+            "name": row[name_col] if name_col is not None else "",
+            "email": row[email_col] if email_col is not None else "",
+            "most": {t: scores[f"most_{t.lower()}"] for t in TRAITS},
+            "least": {t: scores[f"least_{t.lower()}"] for t in TRAITS},
+            "comp": {t: scores[f"comp_{t.lower()}"] for t in TRAITS},
+        })
+    return parsed
+
+
+def output_stem(index, row):
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", row["name"]).strip("_") or "respondent"
+    return f"{index + 1:04d}_{slug[:40]}"
+
+
+def write_atomic(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def init_worker():
+    import matplotlib
+    matplotlib.use("Agg")
+
+
+def render_report(job):
+    """Render one row's images; returns (index, status, error)"""
+    index, row, output_dir, profile = job
+    stem = output_stem(index, row)
+    chart_path = os.path.join(output_dir, f"{stem}_chart.{PROFILE_EXTENSIONS[profile]}")
+    scores_path = os.path.join(output_dir, f"{stem}_scores.png")
+    if os.path.exists(chart_path) and os.path.exists(scores_path):
+        return index, "skipped", None
+    try:
+        from charts import disc_config, draw_disc_chart
+        from reports import create_scores_image
+
+        write_atomic(chart_path, draw_disc_chart(row["most"], row["least"], row["comp"], disc_config, profile))
+        write_atomic(scores_path, create_scores_image(row["name"], row["most"], row["least"], row["comp"]))
+        return index, "rendered", None
+    except Exception as e:
+        return index, "failed", f"{type(e).__name__}: {e}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate DISC report images for every row of a CSV")
+    parser.add_argument("csv", help="CSV of scores or a raw export of the response sheet")
+    parser.add_argument("--output", default="reports", help="output directory (default: reports)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="worker processes (default: CPU count)")
+    parser.add_argument("--profile", choices=sorted(PROFILE_EXTENSIONS), default="print",
+                        help="chart output profile (default: print)")
+    args = parser.parse_args()
+
+    rows = read_score_rows(args.csv)
+    os.makedirs(args.output, exist_ok=True)
+    jobs = [(index, row, args.output, args.profile) for index, row in enumerate(rows)]
+
+    counts = {"rendered": 0, "skipped": 0, "failed": 0}
+    started = time.perf_counter()
+    with multiprocessing.Pool(args.workers, initializer=init_worker) as pool:
+        for done, (index, status, error) in enumerate(pool.imap_unordered(render_report, jobs), 1):
+            counts[status] += 1
+            if error:
+                print(f"  row {index + 1} ({rows[index]['name']}): {error}")
+            if done % 50 == 0 or done == len(jobs):
+                print(f"{done}/{len(jobs)} done")
+    elapsed = time.perf_counter() - started
+
+    rate = counts["rendered"] / elapsed if elapsed else 0.0
+    print(f"Rendered {counts['rendered']}, skipped {counts['skipped']} existing, "
+          f"failed {counts['failed']} in {elapsed:.1f}s with {args.workers} workers "
+          f"({rate:.1f} reports/s)")
+
+
+if __name__ == "__main__":
+    main()
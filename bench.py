@@ -0,0 +1,340 @@
+"""Micro-benchmarks for the submit pipeline's hot paths
+
+Each benchmark is timed in rounds of several calls (sized like timeit's
+autorange) and reported as per-call median, min and p95. Nothing leaves the
+process: the Sheets writer runs against fakes.FakeSheetConnection and the
+email benchmark stops at building the MIME message.
+
+    python bench.py                                   # print a table
+    python bench.py --output bench.json               # also save results
+    python bench.py --compare bench.json --threshold 0.25
+                                                      # exit 1 if any median is >25% slower
+    python bench.py --only chart                      # benchmarks whose name contains "chart"
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import matplotlib
+matplotlib.use("Agg")
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """Register setup() -> callable as a benchmark; setup returns None to skip it"""
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+# ---------- Representative inputs ----------
+def sample_answers(count=8, seed=1234):
+    """Deterministic (most, least) answer lists: a few pure profiles plus random ones"""
+    from scoring import questions
+
+    rng = random.Random(seed)
+    answer_sets = []
+    for pick in range(4):
+        # Every MOST on the same option position, LEAST on the next one
+        most = [q["most"][pick] for q in questions]
+        least = [q["least"][(pick + 1) % 4] for q in questions]
+        answer_sets.append((most, least))
+    while len(answer_sets) < count:
+        most, least = [], []
+        for q in questions:
+            m, l = rng.sample(range(4), 2)
+            most.append(q["most"][m])
+            least.append(q["least"][l])
+        answer_sets.append((most, least))
+    return answer_sets
+
+
+def sample_profiles(count=8):
+    """(most, least, comp) score dicts for the sample answers"""
+    from scoring import encode_responses, score_batch, scores_dict
+
+    profiles = []
+    for most_answers, least_answers in sample_answers(count):
+        most_arr, least_arr, comp_arr = score_batch(*encode_responses(most_answers, least_answers))
+        profiles.append((scores_dict(most_arr[0]), scores_dict(least_arr[0]), scores_dict(comp_arr[0])))
+    return profiles
+
+
+def cycle(items):
+    """Callable returning the next item on each call, round-robin"""
+    state = {"i": 0}
+
+    def next_item():
+        item = items[state["i"] % len(items)]
+        state["i"] += 1
+        return item
+    return next_item
+
+
+def sample_record(most, least, comp, answers):
+    data = {"name": "Benchmark Respondent", "email": "bench@example.com", "phone": "+60123456789"}
+    for trait in "DISC":
+        data[f"most_{trait.lower()}"] = most[trait]
+        data[f"least_{trait.lower()}"] = least[trait]
+        data[f"comp_{trait.lower()}"] = comp[trait]
+    for i, (m, l) in enumerate(zip(*answers)):
+        data[f"q{i + 1}_most"] = m
+        data[f"q{i + 1}_least"] = l
+    return data
+
+
+# ---------- Benchmarks ----------
+@benchmark("scoring_single")
+def bench_scoring_single():
+    from scoring import encode_responses, score_batch, scores_dict
+
+    answers = cycle(sample_answers())
+
+    def run():
+        most_arr, least_arr, comp_arr = score_batch(*encode_responses(*answers()))
+        return scores_dict(most_arr[0]), scores_dict(least_arr[0]), scores_dict(comp_arr[0])
+    return run
+
+
+@benchmark("scoring_batch_1000")
+def bench_scoring_batch():
+    from scoring import encode_answer_table, score_batch
+
+    answer_sets = sample_answers(1000)
+    most_names = [most for most, _ in answer_sets]
+    least_names = [least for _, least in answer_sets]
+    return lambda: score_batch(*encode_answer_table(most_names, least_names))
+
+
+@benchmark("chart_template")
+def bench_chart_template():
+    import charts
+
+    profiles = cycle(sample_profiles())
+    template = charts.get_chart_template(charts.disc_config, charts.OUTPUT_PROFILES["print"].dpi)
+    return lambda: template.render(*profiles(), "print")
+
+
+@benchmark("chart_template_screen")
+def bench_chart_template_screen():
+    import charts
+
+    profiles = cycle(sample_profiles())
+    template = charts.get_chart_template(charts.disc_config, charts.OUTPUT_PROFILES["screen"].dpi)
+    return lambda: template.render(*profiles(), "screen")
+
+
+@benchmark("chart_template_email")
+def bench_chart_template_email():
+    import charts
+
+    profiles = cycle(sample_profiles())
+    template = charts.get_chart_template(charts.disc_config, charts.OUTPUT_PROFILES["email"].dpi)
+    return lambda: template.render(*profiles(), "email")
+
+
+@benchmark("chart_submit")
+def bench_chart_submit():
+    import charts
+
+    profiles = cycle(sample_profiles())
+    return lambda: charts.render_charts(*profiles(), charts.disc_config, ("email", "screen"))
+
+
+@benchmark("chart_full")
+def bench_chart_full():
+    import charts
+
+    profiles = cycle(sample_profiles())
+    return lambda: charts.render_disc_chart(*profiles(), charts.disc_config)
+
+
+@benchmark("chart_atlas")
+def bench_chart_atlas():
+    import charts
+    from atlas import get_chart_atlas
+
+    atlas = get_chart_atlas(charts.CHART_ATLAS_PATH, charts.config_digest(charts.disc_config),
+                            charts.TICK_PLACEMENT)
+    if atlas is None:
+        return None
+    profiles = cycle(sample_profiles())
+    return lambda: atlas.render(*profiles())
+
+
+@benchmark("chart_cache_hit")
+def bench_chart_cache_hit():
+    import charts
+
+    profiles = sample_profiles()
+    for profile in profiles:
+        charts.draw_disc_chart(*profile, charts.disc_config)
+    next_profile = cycle(profiles)
+    return lambda: charts.draw_disc_chart(*next_profile(), charts.disc_config)
+
+
+@benchmark("scores_image")
+def bench_scores_image():
+    from reports import create_scores_image
+
+    profiles = cycle(sample_profiles())
+    return lambda: create_scores_image("Benchmark Respondent", *profiles())
+
+
+@benchmark("email_message")
+def bench_email_message():
+    import charts
+    from reports import build_results_message, create_scores_image
+
+    profile = sample_profiles(1)[0]
+    chart_png = charts.render_chart(*profile, charts.disc_config, "email")
+    scores_png = create_scores_image("Benchmark Respondent", *profile)
+
+    def run():
+        msg = build_results_message("sender@example.com", "bench@example.com", "Benchmark Respondent",
+                                    *profile, scores_png, chart_png)
+        return msg.as_bytes()
+    return run
+
+
+@benchmark("record_row")
+def bench_record_row():
+    from storage import make_record, record_to_row
+
+    data = sample_record(*sample_profiles(1)[0], sample_answers(1)[0])
+    return lambda: record_to_row(make_record(data))
+
+
+@benchmark("sheet_spool_submit")
+def bench_sheet_spool_submit():
+    from fakes import FakeSheetConnection
+    from sheets import SheetWriter, TokenBucket
+    from storage import make_record, record_to_row
+
+    row = record_to_row(make_record(sample_record(*sample_profiles(1)[0], sample_answers(1)[0])))
+    # Batches large and intervals long enough that the writer never flushes mid-run
+    writer = SheetWriter(FakeSheetConnection(), spool_path=":memory:", batch_rows=10 ** 9,
+                         flush_interval_ms=10 ** 9, limiter=TokenBucket(10 ** 6, 10 ** 6))
+    return lambda: writer.submit(row)
+
+
+# ---------- Runner ----------
+def time_benchmark(fn, rounds, min_round_seconds):
+    """Per-call timings in seconds, one per round"""
+    fn()  # warm caches, fonts and lazy imports
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        if time.perf_counter() - started >= min_round_seconds:
+            break
+        number *= 2
+    per_call = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        per_call.append((time.perf_counter() - started) / number)
+    return per_call, number
+
+
+def summarize(per_call, number):
+    ordered = sorted(per_call)
+    return {
+        "median_us": round(statistics.median(ordered) * 1e6, 2),
+        "min_us": round(ordered[0] * 1e6, 2),
+        "p95_us": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] * 1e6, 2),
+        "rounds": len(ordered),
+        "calls_per_round": number,
+    }
+
+
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(names, rounds, min_round_seconds):
+    results = {}
+    for name in names:
+        fn = BENCHMARKS[name]()
+        if fn is None:
+            print(f"{name:>20}: skipped")
+            continue
+        results[name] = summarize(*time_benchmark(fn, rounds, min_round_seconds))
+        r = results[name]
+        print(f"{name:>20}: median {r['median_us']:>11.1f} us   min {r['min_us']:>11.1f} us   "
+              f"p95 {r['p95_us']:>11.1f} us")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Names of benchmarks whose median is more than threshold slower than the baseline"""
+    regressions = []
+    for name, r in results.items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        change = r["median_us"] / base["median_us"] - 1
+        flag = "REGRESSION" if change > threshold else ""
+        print(f"{name:>20}: {base['median_us']:>11.1f} -> {r['median_us']:>11.1f} us ({change:+.1%}) {flag}")
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the submit pipeline's hot paths")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="baseline JSON from an earlier --output run")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed slowdown of a median against the baseline (default: 0.25)")
+    parser.add_argument("--rounds", type=int, default=15, help="timed rounds per benchmark")
+    parser.add_argument("--min-round-ms", type=float, default=50,
+                        help="calls per round are doubled until a round takes this long")
+    parser.add_argument("--only", help="run only benchmarks whose name contains this")
+    args = parser.parse_args()
+
+    names = [name for name in BENCHMARKS if not args.only or args.only in name]
+    results = run_benchmarks(names, args.rounds, args.min_round_ms / 1000)
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"\nAgainst {args.compare} ({baseline.get('meta', {}).get('commit')}):")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) regressed more than {args.threshold:.0%}: "
+                  + ", ".join(regressions))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
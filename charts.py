@@ -0,0 +1,834 @@
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+import matplotlib
+from PIL import Image
+from matplotlib import _tight_bbox
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+import metrics
+from atlas import get_chart_atlas
+
+# Charts are only ever rendered to PNG bytes, never shown in a window
+matplotlib.use("Agg")
+
+# ---------- Chart generation ----------
+disc_config = {
+    "MOST": {
+        "grey_zones": [
+            (0.00, 0.231, "#e0e0e0"),  # light top (90% of white zone)
+            (0.488, 0.533, "#bfbfbf"),  # dark upper mid (35% of white zone)
+            (0.533, 0.578, "#bfbfbf"),  # dark lower mid (35% of white zone)
+            (0.835, 1.00, "#e0e0e0"),  # light bottom (64% of white zone)
+        ],
+        "coords": {
+            "D": {
+                17: 0.03,
+                16: 0.05,
+                15: 0.07,
+                14: 0.14,
+                12: 0.235,
+                11: 0.27,
+                10: 0.32,
+                9: 0.34,
+                8: 0.38,
+                7: 0.42,
+                6: 0.46,
+                5: 0.485,
+                4: 0.515,
+                3: 0.545,
+                2: 0.58,
+                1: 0.665,
+                0: 0.775
+                },
+
+            "I": {
+                17: 0.07,
+                16: 0.1,
+                15: 0.14,
+                13: 0.21,
+                12: 0.235,
+                11: 0.32,
+                10: 0.35,
+                9: 0.375,
+                8: 0.42,
+                7: 0.47,
+                6: 0.49,
+                5: 0.51,
+                4: 0.53,
+                3: 0.55,
+                2: 0.59,
+                1: 0.675,
+                0: 0.80
+            },
+
+            "S": {
+                17: 0.07,
+                16: 0.21,
+                15: 0.27,
+                14: 0.325,
+                13: 0.37,
+                12: 0.4,
+                11: 0.445,
+                10: 0.48,
+                9: 0.505,
+                8: 0.525,
+                7: 0.545,
+                6: 0.56,
+                5: 0.58,
+                4: 0.625,
+                3: 0.68,
+                2: 0.74,
+                1: 0.79,
+                0: 0.865
+
+            },
+
+
+            "C": {
+                14:  0.07,
+                13: 0.1,
+                12: 0.14,
+                11: 0.3,
+                10: 0.34,
+                9: 0.38,
+                8: 0.44,
+                7: 0.475,
+                6: 0.515,
+                5: 0.545,
+                4: 0.56,
+                3: 0.645,
+                2: 0.72,
+                1: 0.775,
+                0: 0.92
+
+            },
+        },
+        "offsets": {"D":0.0,"I":0.0,"S":0.0,"C":0.0},
+    },
+
+    "LEAST": {
+        "grey_zones": [
+            (0.00, 0.231, "#e0e0e0"),  # light top (90% of white zone)
+            (0.488, 0.533, "#bfbfbf"),  # dark upper mid (35% of white zone)
+            (0.533, 0.578, "#bfbfbf"),  # dark lower mid (35% of white zone)
+            (0.835, 1.00, "#e0e0e0"),  # light bottom (64% of white zone)
+        ],
+        "coords": {
+            "D": {
+                0: 0.07,
+                1: 0.12,
+                2: 0.27,
+                3: 0.33,
+                4: 0.38,
+                5: 0.43,
+                6: 0.46,
+                7: 0.49,
+                8: 0.51,
+                9: 0.53,
+                10: 0.54,
+                11: 0.56,
+                12: 0.58,
+                13: 0.63,
+                14: 0.665,
+                15: 0.73,
+                16: 0.765,
+                17: 0.8,
+                18: 0.865,
+                19:0.96
+                },
+
+            "I": {
+                0: 0.07,
+                1: 0.235,
+                2: 0.34,
+                3: 0.43,
+                4: 0.48,
+                5: 0.52,
+                6: 0.54,
+                7: 0.595,
+                8: 0.645, 
+                9: 0.685,
+                10: 0.75,
+                11: 0.775,
+                12: 0.82,
+                13: 0.84,
+                14: 0.885,
+                16: 0.96
+
+            },
+
+            "S": {
+                0:  0.07,
+                1: 0.395,
+                2: 0.46,
+                3: 0.52,
+                4: 0.54,
+                5: 0.59,
+                6: 0.63,
+                7: 0.68,
+                8: 0.74,
+                9: 0.775,
+                10: 0.795,
+                11: 0.82,
+                12: 0.885,
+                14: 0.96
+            },
+
+
+            "C": {
+                0:  0.07,
+                1: 0.27,
+                2: 0.395,
+                3: 0.46,
+                4: 0.49,
+                5: 0.52,
+                6: 0.54,
+                7: 0.56,
+                8: 0.575,
+                9: 0.62,
+                10: 0.68,
+                11: 0.75,
+                12: 0.775,
+                13: 0.825,
+                14: 0.855,
+                15: 0.92,
+                16: 0.96
+
+
+            },
+        },
+        "offsets": {"D":0.0,"I":0.0,"S":0.0,"C":0.0},
+    },
+
+    "COMPOSITE": {
+        "grey_zones": [
+            (0.00, 0.231, "#e0e0e0"),  # light top (90% of white zone)
+            (0.488, 0.533, "#bfbfbf"),  # dark upper mid (35% of white zone)
+            (0.533, 0.578, "#bfbfbf"),  # dark lower mid (35% of white zone)
+            (0.835, 1.00, "#e0e0e0"),  # light bottom (64% of white zone)
+        ],
+        "coords": {
+            "D": {
+                15: 0.04,
+                14: 0.09,
+                13: 0.115,
+                12: 0.21,
+                11: 0.235,
+                9: 0.27,
+                7: 0.33,
+                5: 0.36,
+                3: 0.40,
+                1: 0.43,
+                0: 0.46,
+                -1: 0.48,
+                -3: 0.50,
+                -5: 0.525,
+                -6: 0.54,
+                -8: 0.56,
+                -9: 0.58,
+                -11: 0.62,
+                -12: 0.65,
+                -13: 0.68,
+                -14: 0.72,
+                -15: 0.75,
+                -16: 0.8,
+                },
+
+            "I": {
+                18:  0.09,
+                16:  0.115,
+                14:  0.16,
+                12:  0.21,
+                11:  0.235,
+                9:  0.275,
+                8:  0.34,
+                7:  0.365,
+                6:  0.405,
+                4:  0.435,
+                2:  0.49,
+                0:  0.51,
+                -1:  0.53,
+                -3:  0.545,
+                -4:  0.57,
+                -5:  0.61,
+                -6:  0.635,
+                -7:  0.685,
+                -8:  0.735,
+                -9:  0.775,
+                -11:  0.81,
+                -12:  0.84,
+                -13:  0.89,
+                -14:  0.915,
+                -16:  0.96,
+            },
+
+            "S": {
+                17:  0.09,
+                16:  0.17,
+                15:  0.235,
+                14:  0.275,
+                13: 0.353,
+                12: 0.39,
+                10: 0.42,
+                9: 0.46,
+                7: 0.505,
+                5: 0.53,
+                3: 0.54,
+                1: 0.565,
+                0: 0.59,
+                -1: 0.615,
+                -2: 0.64,
+                -4: 0.67,
+                -5: 0.72,
+                -6: 0.745,
+                -8: 0.775,
+                -9: 0.81,
+                -10: 0.89,
+                -12: 0.915,
+                -13: 0.96
+            },
+
+
+            "C": {
+                13:  0.09,
+                12: 0.115,
+                11: 0.21,
+                10: 0.275,
+                9: 0.34,
+                8: 0.365,
+                7: 0.39,
+                6: 0.42,
+                5: 0.44,
+                4: 0.46,
+                3: 0.48,
+                2: 0.50,
+                1: 0.52,
+                0: 0.54,
+                -1: 0.56,
+                -3: 0.575,
+                -4: 0.60,
+                -5: 0.625,
+                -6: 0.65,
+                -7: 0.67,
+                -8: 0.72,
+                -9: 0.755,
+                -10: 0.775,
+                -11: 0.8,
+                -12: 0.84,
+                -13: 0.87,
+                -14: 0.92,
+                -15: 0.96
+            },
+        },
+        "offsets": {
+            "D": 0.0,
+            "I": 0.0,
+            "S": 0.0,
+            "C": 0.0,
+        },
+    }   
+}
+
+
+# id(config) -> (config, digest); holding the config keeps its id from being reused
+_digests = {}
+
+
+def config_digest(config):
+    """Stable hash of a disc_config-style dict, computed once per config object
+
+    Configs are treated as read-only once used; hashing the whole dict on
+    every chart cache lookup cost more than the lookup itself.
+    """
+    cached = _digests.get(id(config))
+    if cached is not None and cached[0] is config:
+        return cached[1]
+    blob = json.dumps(config, sort_keys=True, default=str)
+    digest = hashlib.sha256(blob.encode("utf-8")).hexdigest()
+    _digests[id(config)] = (config, digest)
+    return digest
+
+
+# -------------------------------------------------------
+# DRAW FUNCTION
+# -------------------------------------------------------
+LABELS = ["D", "I", "S", "C"]
+PANELS = [
+    ("MOST\n(Projected Concept)", "MOST"),
+    ("LEAST\n(Private Concept)", "LEAST"),
+    ("COMPOSITE\n(Public Concept)", "COMPOSITE"),
+]
+
+
+def draw_grid(ax, title, cfg):
+    """Draw the static part of one graph: zones, midline, tick numbers and frame"""
+    # Draw grey zones
+    for lo, hi, color in cfg["grey_zones"]:
+        ax.axhspan(lo, hi, facecolor=color, alpha=1.0, zorder=0)
+
+    # Add light black line in the middle
+    ax.axhline(y=0.533, color="black", lw=1, alpha=0.4, zorder=1)
+
+    # Draw numbers for each column
+    for col_idx, col in enumerate(LABELS):
+        for v, y in cfg["coords"][col].items():
+            ax.text(col_idx, y, f"{v}", color="black", fontsize=18,
+                    ha="center", va="center", zorder=1)
+
+    ax.set_xticks(np.arange(len(LABELS)))
+    ax.set_xticklabels(LABELS, fontsize=12, fontweight="bold")
+    ax.set_xlim(-0.5, len(LABELS) - 0.2)
+    ax.set_ylim(1, 0)
+    ax.set_yticks([])
+    ax.set_title(title, fontsize=12, fontweight="bold", pad=18)
+    for s in ax.spines.values():
+        s.set_linewidth(1.2)
+
+
+# -------------------------------------------------------
+# TICK TABLES
+# -------------------------------------------------------
+# "nearest" snaps a score to the closest labelled tick (the original behaviour);
+# "interpolate" places scores between ticks linearly, e.g. COMPOSITE D=10.
+TICK_PLACEMENT = os.getenv("CHART_TICK_PLACEMENT", "nearest")
+
+
+class TickTables:
+    """disc_config coords compiled into dense lookup arrays indexed by integer score
+
+    For each chart type, table[score - lo, column] is the y position of that
+    score, covering every integer from the lowest to the highest tick of any
+    column. Scores outside that range clamp to the ends.
+    """
+
+    def __init__(self, config, placement=TICK_PLACEMENT):
+        if placement not in ("nearest", "interpolate"):
+            raise ValueError(f"Unknown tick placement: {placement}")
+        self.placement = placement
+        self.tables = {}
+        for chart_type, cfg in config.items():
+            coords = cfg["coords"]
+            for col in LABELS:
+                validate_ticks(chart_type, col, coords[col])
+            lo = min(min(coords[col]) for col in LABELS)
+            hi = max(max(coords[col]) for col in LABELS)
+            scores = np.arange(lo, hi + 1)
+            table = np.column_stack([self._column(coords[col], scores) for col in LABELS])
+            self.tables[chart_type] = (lo, table)
+
+    def _column(self, tick_map, scores):
+        if self.placement == "interpolate":
+            ticks = sorted(tick_map)
+            return np.interp(scores, ticks, [tick_map[t] for t in ticks])
+        # Same tie-breaking as a min() over the dict keys
+        return np.array([tick_map[min(tick_map, key=lambda t: abs(t - v))] for v in scores])
+
+    def positions(self, chart_type, values_dict):
+        """y position of each column's value for one profile"""
+        scores = np.array([[values_dict[col] for col in LABELS]])
+        return self.positions_batch(chart_type, scores)[0].tolist()
+
+    def positions_batch(self, chart_type, scores):
+        """y positions for an (N, 4) array of D/I/S/C scores"""
+        lo, table = self.tables[chart_type]
+        rows = np.clip(np.rint(scores).astype(int) - lo, 0, len(table) - 1)
+        return table[rows, np.arange(len(LABELS))]
+
+
+def validate_ticks(chart_type, col, tick_map):
+    """Tick positions must move strictly one way as the score increases"""
+    ys = np.array([tick_map[t] for t in sorted(tick_map)])
+    steps = np.diff(ys)
+    if not (np.all(steps > 0) or np.all(steps < 0)):
+        raise ValueError(f"{chart_type} {col} coords are not monotonic in score")
+
+
+_tick_tables = {}
+_tick_tables_lock = threading.Lock()
+
+
+def get_tick_tables(config, placement=TICK_PLACEMENT):
+    """The TickTables for this config, compiled on first use"""
+    key = (config_digest(config), placement)
+    with _tick_tables_lock:
+        tables = _tick_tables.get(key)
+        if tables is None:
+            tables = _tick_tables[key] = TickTables(config, placement)
+        return tables
+
+
+# -------------------------------------------------------
+# OUTPUT PROFILES
+# -------------------------------------------------------
+# The figure is 12x12in; dpi sets the pixel size. "screen" is the in-page
+# preview (small enough for phones), "email" the attachment, "print" the
+# original full-resolution PNG and "vector" an SVG. Only "print", which is
+# rendered on request, pays for an optimizing PNG pass; the email attachment
+# is re-encoded against the attachment budget anyway (see reports.py).
+ChartProfile = namedtuple("ChartProfile", ["dpi", "format", "optimize"])
+
+OUTPUT_PROFILES = {
+    "screen": ChartProfile(dpi=100, format="webp", optimize=False),
+    "email": ChartProfile(dpi=150, format="png", optimize=False),
+    "print": ChartProfile(dpi=240, format="png", optimize=True),
+    "vector": ChartProfile(dpi=72, format="svg", optimize=False),
+}
+DEFAULT_PROFILE = "print"
+
+
+def encode_image(img, fmt, optimize=False):
+    """Encode a Pillow image losslessly as PNG or WebP"""
+    buf = io.BytesIO()
+    if fmt == "webp":
+        img.save(buf, format="WEBP", lossless=True, method=4)
+    else:
+        img.save(buf, format="PNG", optimize=optimize)
+    return buf.getvalue()
+
+
+def scale_image(img, from_dpi, to_dpi):
+    """Scale a raster chart down from one dpi to a lower one"""
+    if to_dpi >= from_dpi:
+        return img
+    scale = to_dpi / from_dpi
+    return img.resize((round(img.width * scale), round(img.height * scale)), Image.LANCZOS)
+
+
+def encode_chart(img, dpi, profile):
+    """Encode a raster chart rendered at dpi for an output profile, scaling it down if needed"""
+    spec = OUTPUT_PROFILES[profile]
+    return encode_image(scale_image(img, dpi, spec.dpi), spec.format, spec.optimize)
+
+
+def figure_image(fig, dpi):
+    """Rasterize a figure at dpi with a tight bounding box, as an RGB Pillow image"""
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", dpi=dpi, bbox_inches="tight")
+    buf.seek(0)
+    with Image.open(buf) as png:
+        # The figure background is opaque, so the alpha channel is dead weight
+        return png.convert("RGB")
+
+
+def save_chart(fig, profile=DEFAULT_PROFILE):
+    """Encode a figure for an output profile with a tight bounding box"""
+    spec = OUTPUT_PROFILES[profile]
+    if spec.format == "svg":
+        buf = io.BytesIO()
+        fig.savefig(buf, format="svg", bbox_inches="tight")
+        return buf.getvalue()
+    return encode_chart(figure_image(fig, spec.dpi), spec.dpi, profile)
+
+
+def render_disc_figure(most, least, comp, config):
+    """The three DISC graphs drawn from scratch on a new pyplot figure; close it when done"""
+    import matplotlib.pyplot as plt
+
+    tick_tables = get_tick_tables(config)
+
+    def grid_and_plot(ax, title, chart_type, values_dict):
+        draw_grid(ax, title, config[chart_type])
+
+        # Plot red values
+        xs = list(range(len(LABELS)))
+        ys = tick_tables.positions(chart_type, values_dict)
+        ax.plot(xs, ys, color="red", lw=2, zorder=3)
+        ax.scatter(xs, ys, color="red", s=50, zorder=4)
+        for col_idx, y in zip(xs, ys):
+            v = values_dict[LABELS[col_idx]]
+            ax.text(col_idx + 0.15, y, f"{v}", color="red", fontsize=10,
+                    fontweight="bold", ha="left", va="center", zorder=5)
+
+    # Create 3 charts
+    fig, axes = plt.subplots(1, 3, figsize=(12, 12))
+    plt.subplots_adjust(wspace=0.08)
+    fig.suptitle("DISC Graphs", fontsize=16, fontweight="bold")
+
+    for ax, (title, chart_type), values in zip(axes, PANELS, (most, least, comp)):
+        grid_and_plot(ax, title, chart_type, values)
+    return fig
+
+
+def render_disc_chart(most, least, comp, config, profile=DEFAULT_PROFILE):
+    """Render the three DISC graphs from scratch, encoded for profile"""
+    import matplotlib.pyplot as plt
+
+    fig = render_disc_figure(most, least, comp, config)
+    try:
+        return save_chart(fig, profile)
+    finally:
+        plt.close(fig)
+
+
+class ChartTemplate:
+    """The three DISC graphs rasterized once at one dpi, with only the red artists drawn per chart
+
+    The grey zones, midline and ~230 tick numbers never change for a given
+    config, so the template works out the savefig(bbox_inches="tight") crop
+    once, renders that static background once and keeps a copy of its
+    pixels. Each render restores those pixels and draws just the red line,
+    markers and value labels over them; the result is pixel-identical to
+    rendering the whole figure. Holds two RGBA buffers of the cropped chart
+    (~48 MB at 240 dpi, ~19 MB at 150 dpi).
+    """
+
+    def __init__(self, config, dpi):
+        self.config = config
+        self.dpi = dpi
+        self.tick_tables = get_tick_tables(config)
+        self._lock = threading.Lock()
+        # A bare Figure is not tracked by pyplot, so it can live for the whole process
+        self.fig = Figure(figsize=(12, 12), dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.fig)
+        axes = self.fig.subplots(1, 3)
+        self.fig.subplots_adjust(wspace=0.08)
+        self.fig.suptitle("DISC Graphs", fontsize=16, fontweight="bold")
+
+        xs = list(range(len(LABELS)))
+        self.panels = []
+        for ax, (title, chart_type) in zip(axes, PANELS):
+            draw_grid(ax, title, config[chart_type])
+            # Animated artists are left out of canvas.draw() and drawn by hand in render_image
+            line, = ax.plot(xs, [0] * len(xs), color="red", lw=2, zorder=3, animated=True)
+            markers = ax.scatter(xs, [0] * len(xs), color="red", s=50, zorder=4, animated=True)
+            value_labels = [
+                ax.text(col_idx + 0.15, 0, "", color="red", fontsize=10,
+                        fontweight="bold", ha="left", va="center", zorder=5, animated=True)
+                for col_idx in xs
+            ]
+            self.panels.append((ax, chart_type, line, markers, value_labels))
+
+        # Crop the figure exactly as savefig(bbox_inches="tight") does, but only once
+        renderer = self.canvas.get_renderer()
+        bbox = self.fig.get_tightbbox(renderer).padded(matplotlib.rcParams["savefig.pad_inches"])
+        _tight_bbox.adjust_bbox(self.fig, bbox, renderer)
+        self.canvas.draw()
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+
+    def render_image(self, most, least, comp):
+        """Draw the red artists for these scores over the background, as an RGB image at self.dpi"""
+        with self._lock:
+            self.canvas.restore_region(self.background)
+            for (ax, chart_type, line, markers, value_labels), values in zip(self.panels, (most, least, comp)):
+                xs = list(range(len(LABELS)))
+                ys = self.tick_tables.positions(chart_type, values)
+                line.set_data(xs, ys)
+                markers.set_offsets(np.column_stack([xs, ys]))
+                ax.draw_artist(line)
+                ax.draw_artist(markers)
+                for col_idx, (label, y) in enumerate(zip(value_labels, ys)):
+                    label.set_position((col_idx + 0.15, y))
+                    label.set_text(f"{values[LABELS[col_idx]]}")
+                    ax.draw_artist(label)
+            size = self.canvas.get_width_height()
+            # convert() copies the pixels out before the next render reuses the canvas
+            return Image.frombuffer("RGBA", size, self.canvas.buffer_rgba(), "raw", "RGBA", 0, 1).convert("RGB")
+
+    def render(self, most, least, comp, profile=DEFAULT_PROFILE):
+        """Render these scores and encode them for a raster profile at or below self.dpi"""
+        return encode_chart(self.render_image(most, least, comp), self.dpi, profile)
+
+
+# "template" reuses one pre-rendered figure per config and dpi; "full" redraws
+# everything each time; "atlas" draws onto the pre-rendered atlas with Pillow
+# (see atlas.py), falling back to "template" when no atlas has been built for
+# this config. SVG is always drawn in full.
+CHART_RENDER_MODE = os.getenv("CHART_RENDER_MODE", "template")
+CHART_ATLAS_PATH = os.getenv("CHART_ATLAS_PATH", "disc_atlas.png")
+
+_templates = {}
+_templates_lock = threading.Lock()
+
+
+def get_chart_template(config, dpi):
+    """The ChartTemplate for this config at dpi, built on first use"""
+    key = (config_digest(config), dpi)
+    with _templates_lock:
+        template = _templates.get(key)
+        if template is None:
+            template = _templates[key] = ChartTemplate(config, dpi)
+        return template
+
+
+def render_image(most, least, comp, config, dpi):
+    """Rasterize the DISC graphs at dpi through the configured CHART_RENDER_MODE"""
+    if CHART_RENDER_MODE == "atlas":
+        atlas = get_chart_atlas(CHART_ATLAS_PATH, config_digest(config), TICK_PLACEMENT)
+        if atlas is not None:
+            # The atlas is raster at its build dpi; scale down for smaller profiles
+            return scale_image(atlas.render_image(most, least, comp), atlas.dpi, dpi)
+    if CHART_RENDER_MODE in ("template", "atlas"):
+        return get_chart_template(config, dpi).render_image(most, least, comp)
+    import matplotlib.pyplot as plt
+
+    fig = render_disc_figure(most, least, comp, config)
+    try:
+        return figure_image(fig, dpi)
+    finally:
+        plt.close(fig)
+
+
+def render_charts(most, least, comp, config, profiles):
+    """{profile: encoded chart}, rasterizing once at the highest dpi asked for
+
+    Smaller raster profiles are scaled down from that one image with Pillow,
+    so e.g. the page preview costs a resize and an encode, not another render.
+    """
+    charts = {}
+    raster = [p for p in profiles if OUTPUT_PROFILES[p].format != "svg"]
+    for profile in profiles:
+        if profile not in raster:
+            charts[profile] = render_disc_chart(most, least, comp, config, profile)
+    if raster:
+        dpi = max(OUTPUT_PROFILES[p].dpi for p in raster)
+        img = render_image(most, least, comp, config, dpi)
+        for profile in raster:
+            charts[profile] = encode_chart(img, dpi, profile)
+    return charts
+
+
+def render_chart(most, least, comp, config, profile=DEFAULT_PROFILE):
+    """Render through the configured CHART_RENDER_MODE, encoded for profile"""
+    return render_charts(most, least, comp, config, (profile,))[profile]
+
+
+# -------------------------------------------------------
+# RENDER CACHE
+# -------------------------------------------------------
+# Most respondents land on a handful of profiles, so finished images are kept
+# in a bounded LRU keyed by the scores, output profile and a config digest.
+CHART_CACHE_SIZE = int(os.getenv("CHART_CACHE_SIZE", "256"))
+# Optional on-disk tier shared across restarts and processes
+CHART_CACHE_DIR = os.getenv("CHART_CACHE_DIR")
+
+
+def chart_cache_key(most, least, comp, config, profile=DEFAULT_PROFILE):
+    """Content address for a chart: the three score tuples, output profile and config digest"""
+    scores = [[values[k] for k in "DISC"] for values in (most, least, comp)]
+    blob = json.dumps([scores, config_digest(config), TICK_PLACEMENT, profile, OUTPUT_PROFILES[profile]])
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class ChartCache:
+    """Thread-safe LRU of rendered chart images with an optional directory tier"""
+
+    def __init__(self, max_entries=CHART_CACHE_SIZE, cache_dir=CHART_CACHE_DIR):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.chart")
+
+    def _remember(self, key, png):
+        self._entries[key] = png
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key):
+        with self._lock:
+            png = self._entries.get(key)
+            if png is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return png
+        if self.cache_dir and os.path.exists(self._path(key)):
+            with open(self._path(key), "rb") as f:
+                png = f.read()
+            with self._lock:
+                self.disk_hits += 1
+                self._remember(key, png)
+            return png
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, png):
+        with self._lock:
+            self._remember(key, png)
+        if self.cache_dir:
+            # Write then rename so readers never see a partial file
+            tmp_path = f"{self._path(key)}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(png)
+            os.replace(tmp_path, self._path(key))
+
+    def stats(self):
+        """Hit/miss/eviction counters and current size"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+chart_cache = ChartCache()
+
+
+def cache_exposition():
+    """Chart cache counters in the Prometheus text format, for the /metrics output"""
+    stats = chart_cache.stats()
+    return [
+        "# HELP disc_chart_cache_lookups_total Chart cache lookups by result.",
+        "# TYPE disc_chart_cache_lookups_total counter",
+        f'disc_chart_cache_lookups_total{{result="hit"}} {stats["hits"]}',
+        f'disc_chart_cache_lookups_total{{result="disk_hit"}} {stats["disk_hits"]}',
+        f'disc_chart_cache_lookups_total{{result="miss"}} {stats["misses"]}',
+        "# HELP disc_chart_cache_evictions_total Charts evicted from the in-memory cache.",
+        "# TYPE disc_chart_cache_evictions_total counter",
+        f"disc_chart_cache_evictions_total {stats['evictions']}",
+        "# HELP disc_chart_cache_entries Charts held in the in-memory cache.",
+        "# TYPE disc_chart_cache_entries gauge",
+        f"disc_chart_cache_entries {stats['entries']}",
+        "# HELP disc_chart_cache_max_entries Capacity of the in-memory chart cache.",
+        "# TYPE disc_chart_cache_max_entries gauge",
+        f"disc_chart_cache_max_entries {stats['max_entries']}",
+    ]
+
+
+metrics.register_collector(cache_exposition)
+
+
+def draw_disc_charts(most, least, comp, config, profiles):
+    """{profile: encoded chart}, rendering once for all the profiles not already cached"""
+    keys = {profile: chart_cache_key(most, least, comp, config, profile) for profile in profiles}
+    charts = {profile: chart_cache.get(key) for profile, key in keys.items()}
+    missing = [profile for profile, data in charts.items() if data is None]
+    if missing:
+        for profile, data in render_charts(most, least, comp, config, missing).items():
+            chart_cache.put(keys[profile], data)
+            charts[profile] = data
+    return charts
+
+
+def draw_disc_chart(most, least, comp, config, profile=DEFAULT_PROFILE):
+    """Return the DISC graphs encoded for an output profile, rendering only on a cache miss"""
+    return draw_disc_charts(most, least, comp, config, (profile,))[profile]
+
+
+# Compile (and validate) the shipped config at import so a bad edit fails at startup
+get_tick_tables(disc_config)
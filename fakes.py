@@ -0,0 +1,327 @@
+"""In-process stand-ins for external services, for load tests and offline runs
+
+FakeSheetConnection behaves like sheets.SheetConnection over an in-memory
+worksheet, with configurable latency and injected 429 quota and 5xx errors
+shaped like the ones gspread raises, so SheetWriter's limiter and backoff
+can be exercised without touching Google:
+
+    from fakes import FakeSheetConnection
+    from sheets import SheetWriter, TokenBucket
+
+    fake = FakeSheetConnection(writes_per_minute=60, error_rate=0.1)
+    writer = SheetWriter(fake, spool_path=":memory:", limiter=TokenBucket(50, 5))
+
+FakeSMTPSession stands in for mailer.SMTPSession the same way, and install()
+points the app's shared Sheets connection and SMTP sessions at the fakes.
+
+SMTPSink is a real (minimal) SMTP server for end-to-end runs of anything
+that talks SMTP, such as resend.py; --auth makes it require a login the way
+Gmail does:
+
+    python fakes.py smtp-sink --port 1025 --maildir sink --auth
+"""
+import argparse
+import base64
+import json
+import os
+import random
+import smtplib
+import socketserver
+import threading
+import time
+from collections import deque
+
+import requests
+from gspread.exceptions import APIError
+
+
+def api_error(status, message, retry_after=None):
+    """A gspread APIError carrying an HTTP response with this status"""
+    response = requests.Response()
+    response.status_code = status
+    response._content = json.dumps(
+        {"error": {"code": status, "message": message, "status": "FAKE"}}
+    ).encode("utf-8")
+    if retry_after is not None:
+        response.headers["Retry-After"] = str(retry_after)
+    return APIError(response)
+
+
+class FakeWorksheet:
+    """The subset of gspread.Worksheet the app uses, kept in a list of rows"""
+
+    def __init__(self, connection):
+        self._connection = connection
+        self.rows = []
+
+    def append_rows(self, rows, **kwargs):
+        self._connection._call(write=True)
+        self.rows.extend([list(row) for row in rows])
+
+    def append_row(self, row, **kwargs):
+        self.append_rows([row])
+
+    def get_all_values(self):
+        self._connection._call(write=False)
+        return [list(row) for row in self.rows]
+
+
+class FakeSheetConnection:
+    """Drop-in for sheets.SheetConnection with simulated latency, quota and server errors
+
+    writes_per_minute enforces a rolling one-minute write quota like the real
+    API (quota_window shortens the "minute" for tests); error_rate is the
+    chance any call fails with a random 500/503. log keeps (monotonic time,
+    outcome, Retry-After) for every call, outcome being ok, quota or server.
+    """
+
+    def __init__(self, latency=0.0, writes_per_minute=None, error_rate=0.0, seed=None, quota_window=60):
+        self.latency = latency
+        self.writes_per_minute = writes_per_minute
+        self.error_rate = error_rate
+        self.quota_window = quota_window
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._writes = deque()
+        self.calls = 0
+        self.quota_errors = 0
+        self.server_errors = 0
+        self.log = []
+        self.worksheet_handle = FakeWorksheet(self)
+
+    def _call(self, write):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.calls += 1
+            now = time.monotonic()
+            if self._random.random() < self.error_rate:
+                self.server_errors += 1
+                self.log.append((now, "server", None))
+                raise api_error(self._random.choice([500, 503]), "Fake backend error")
+            if write and self.writes_per_minute is not None:
+                while self._writes and now - self._writes[0] >= self.quota_window:
+                    self._writes.popleft()
+                if len(self._writes) >= self.writes_per_minute:
+                    self.quota_errors += 1
+                    wait = round(self.quota_window - (now - self._writes[0]), 2)
+                    self.log.append((now, "quota", wait))
+                    raise api_error(429, "Quota exceeded for write requests per minute", retry_after=wait)
+                self._writes.append(now)
+            self.log.append((now, "ok", None))
+
+    def worksheet(self):
+        return self.worksheet_handle
+
+    def run(self, operation):
+        return operation(self.worksheet_handle)
+
+    def reset(self):
+        pass
+
+    def rows(self):
+        """Everything appended so far"""
+        with self._lock:
+            return [list(row) for row in self.worksheet_handle.rows]
+
+
+class FakeSMTPSession:
+    """Drop-in for mailer.SMTPSession that records messages instead of sending them
+
+    error_rate is the chance a send fails with a disconnect, which the outbox retries.
+    """
+
+    def __init__(self, username=None, password=None, latency=0.0, error_rate=0.0, seed=None):
+        self.username = username
+        self.latency = latency
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.sent = []
+        self.errors = 0
+
+    def send(self, msg):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            if self._random.random() < self.error_rate:
+                self.errors += 1
+                raise smtplib.SMTPServerDisconnected("Fake server dropped the connection")
+            self.sent.append(msg["To"])
+
+    def close(self):
+        pass
+
+
+def install(sheet_latency=0.0, smtp_latency=0.0, writes_per_minute=None, error_rate=0.0):
+    """Route this process's Sheets connection and SMTP sessions to fakes
+
+    Call before the app first touches storage or email. Returns the
+    (FakeSheetConnection, [FakeSMTPSession, ...]) so callers can inspect them.
+    """
+    import mailer
+    import sheets
+
+    connection = FakeSheetConnection(sheet_latency, writes_per_minute, error_rate)
+    sessions = []
+
+    def smtp_session(username, password, *args, **kwargs):
+        session = FakeSMTPSession(username, password, smtp_latency, error_rate)
+        sessions.append(session)
+        return session
+
+    sheets.get_sheet_connection = lambda: connection
+    mailer.SMTPSession = smtp_session
+    return connection, sessions
+
+
+class _SinkHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode("ascii"))
+
+    def read_line(self):
+        return self.rfile.readline().decode("utf-8", "replace").strip()
+
+    def authenticate(self, command):
+        """Handle AUTH PLAIN or LOGIN; any credentials are accepted. Returns the username"""
+        parts = command.split()
+        mechanism = parts[1].upper() if len(parts) > 1 else ""
+        if mechanism == "PLAIN":
+            if len(parts) > 2:
+                response = parts[2]
+            else:
+                self.reply("334 ")
+                response = self.read_line()
+            # authzid NUL authcid NUL password
+            return base64.b64decode(response).split(b"\0")[1].decode("utf-8", "replace")
+        if mechanism == "LOGIN":
+            if len(parts) > 2:
+                username = parts[2]
+            else:
+                self.reply("334 VXNlcm5hbWU6")
+                username = self.read_line()
+            self.reply("334 UGFzc3dvcmQ6")
+            self.read_line()
+            return base64.b64decode(username).decode("utf-8", "replace")
+        return None
+
+    def handle(self):
+        sink = self.server.sink
+        self.reply("220 fake-smtp ready")
+        mail_from, recipients = None, []
+        user = None
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode("utf-8", "replace").strip()
+            verb = command[:4].upper()
+            if verb == "EHLO":
+                auth = b"250-AUTH PLAIN LOGIN\r\n" if sink.auth else b""
+                self.wfile.write(b"250-fake-smtp\r\n250-8BITMIME\r\n" + auth + b"250 SIZE 36700160\r\n")
+            elif verb == "HELO":
+                self.reply("250 fake-smtp")
+            elif verb == "AUTH" and sink.auth:
+                try:
+                    user = self.authenticate(command)
+                except (ValueError, IndexError):
+                    user = None
+                if user is None:
+                    self.reply("504 Unrecognized authentication type")
+                else:
+                    sink.logged_in(user)
+                    self.reply("235 Authentication successful")
+            elif verb == "MAIL" and sink.auth and user is None:
+                self.reply("530 5.7.0 Authentication required")
+            elif verb == "MAIL":
+                mail_from, recipients = command[10:].strip(), []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                recipients.append(command[8:].strip())
+                self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                for data_line in iter(self.rfile.readline, b""):
+                    if data_line in (b".\r\n", b".\n"):
+                        break
+                    # Undo dot-stuffing
+                    lines.append(data_line[1:] if data_line.startswith(b"..") else data_line)
+                if sink.latency:
+                    time.sleep(sink.latency)
+                sink.deliver(mail_from, recipients, b"".join(lines))
+                self.reply("250 OK queued")
+            elif verb in ("RSET", "NOOP"):
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class SMTPSink:
+    """Minimal threaded SMTP server that accepts everything and keeps the messages
+
+    Offers no STARTTLS, so point clients at it with SMTP_STARTTLS=0. With
+    auth, it advertises AUTH PLAIN LOGIN and refuses MAIL until the client has
+    logged in (with any credentials); logins lists the usernames that did.
+    """
+
+    def __init__(self, host="127.0.0.1", port=1025, maildir=None, latency=0.0, auth=False):
+        self.maildir = maildir
+        self.latency = latency
+        self.auth = auth
+        self.messages = []
+        self.logins = []
+        self._lock = threading.Lock()
+        if maildir:
+            os.makedirs(maildir, exist_ok=True)
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        self.server = socketserver.ThreadingTCPServer((host, port), _SinkHandler)
+        self.server.daemon_threads = True
+        self.server.sink = self
+        self.port = self.server.server_address[1]
+
+    def logged_in(self, username):
+        with self._lock:
+            self.logins.append(username)
+
+    def deliver(self, mail_from, recipients, data):
+        with self._lock:
+            self.messages.append((mail_from, recipients, data))
+            count = len(self.messages)
+        if self.maildir:
+            with open(os.path.join(self.maildir, f"{count:06d}.eml"), "wb") as f:
+                f.write(data)
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, name="smtp-sink", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run local stand-ins for external services")
+    commands = parser.add_subparsers(dest="command", required=True)
+    sink = commands.add_parser("smtp-sink", help="accept SMTP on a local port and keep the messages")
+    sink.add_argument("--host", default="127.0.0.1")
+    sink.add_argument("--port", type=int, default=1025)
+    sink.add_argument("--maildir", help="also write each message here as NNNNNN.eml")
+    sink.add_argument("--latency", type=float, default=0.0, help="seconds to wait before accepting each message")
+    sink.add_argument("--auth", action="store_true", help="require AUTH (any credentials) before MAIL")
+    args = parser.parse_args()
+
+    server = SMTPSink(args.host, args.port, args.maildir, args.latency, args.auth)
+    print(f"SMTP sink listening on {args.host}:{server.port}; Ctrl+C to stop")
+    try:
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\nReceived {len(server.messages)} messages")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+"""Concurrent-session load test for the app
+
+Drives simulated respondents through the questionnaire and manual-input
+flows with Streamlit's AppTest. Google Sheets and SMTP are replaced by the
+local fakes in fakes.py, with configurable latency, and storage goes to a
+throwaway directory.
+
+Sessions are spread over --processes worker processes. Inside one process
+they share the process-wide caches, Sheets writer and email outbox exactly
+as sessions on one replica do. AppTest swaps process-wide Streamlit globals
+on every run, so script runs within a process are serialized; runs in
+different processes really overlap. Each run's time is split into:
+
+  queue  waiting for the process's run lock (other sessions' runs)
+  run    the script run itself
+
+With --processes 1, the run time is the per-rerun CPU cost on one
+replica, and utilization (run time / wall time) says how close that replica
+is to saturation: near 100% means more simultaneous respondents only add
+queueing. The Sheets writer and email outbox keep running concurrently in
+the background.
+
+AppTest.run() always reruns the whole script: it has no way to rerun just
+a fragment. In the browser, answering a question reruns only the
+questionnaire fragment, so rerun times here are an upper bound on what
+respondents see, and fragment-scoped reruns are not exercised at all.
+
+    python loadtest.py --sessions 200 --concurrency 20
+    python loadtest.py --sessions 200 --concurrency 20 --processes 1
+    python loadtest.py --sessions 50 --manual-share 0.5 --sheet-latency 0.3 --smtp-latency 0.5
+
+Reports throughput, p50/p99 queue and run latency for reruns and submits,
+utilization, per-stage metrics and peak RSS.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+
+def percentile(samples, q):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class Recorder:
+    """Latency samples and error counts collected across one process's session threads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self.reruns = []
+        self.submits = []
+        self.queued = []
+        self.sessions = 0
+        self.errors = []
+
+    def timed_run(self, at, submit=False):
+        queued = time.perf_counter()
+        with self._run_lock:
+            started = time.perf_counter()
+            at.run()
+            elapsed = time.perf_counter() - started
+        with self._lock:
+            self.queued.append(started - queued)
+            (self.submits if submit else self.reruns).append(elapsed)
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+        return elapsed
+
+    def finished(self, error=None):
+        with self._lock:
+            self.sessions += 1
+            if error:
+                self.errors.append(error)
+
+
+def questionnaire_session(index, recorder, answers_per_rerun, timeout):
+    """Fill in identity and every question, rerunning as a browser would, then submit"""
+    from streamlit.testing.v1 import AppTest
+
+    from scoring import questions
+
+    rng = random.Random(index)
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    recorder.timed_run(at)
+    at.text_input(key="q_name").input(f"Load Test {index}")
+    at.text_input(key="q_email").input(f"load{index}@example.com")
+    recorder.timed_run(at)
+
+    pending = 0
+    for i, q in enumerate(questions):
+        most, least = rng.sample(range(4), 2)
+        at.radio(key=f"most_{i}").set_value(q["most"][most])
+        at.radio(key=f"least_{i}").set_value(q["least"][least])
+        pending += 2
+        if pending >= answers_per_rerun:
+            recorder.timed_run(at)
+            pending = 0
+    if pending:
+        recorder.timed_run(at)
+
+    # Paged questionnaires only show the submit button on the last page
+    while not any(b.key == "submit_questionnaire" for b in at.button):
+        at.button(key="page_next").click()
+        recorder.timed_run(at)
+    at.button(key="submit_questionnaire").click()
+    recorder.timed_run(at, submit=True)
+    if not at.image:
+        raise RuntimeError("questionnaire submit produced no chart")
+
+
+def manual_session(index, recorder, timeout):
+    """Type in a name, email and twelve scores, then submit"""
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(index)
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    recorder.timed_run(at)
+    at.text_input(key="m_name").input(f"Manual Load Test {index}")
+    at.text_input(key="m_email").input(f"manual{index}@example.com")
+    for kind in ("most", "least"):
+        for trait in "disc":
+            at.number_input(key=f"m_{kind}_{trait}").set_value(rng.randint(0, 12))
+    for trait in "disc":
+        at.number_input(key=f"m_comp_{trait}").set_value(rng.randint(-12, 12))
+    recorder.timed_run(at)
+    next(b for b in at.button if b.label == "Submit Manual Scores").click()
+    recorder.timed_run(at, submit=True)
+    if not at.image:
+        raise RuntimeError("manual submit produced no chart")
+
+
+def run_session(index, recorder, args):
+    try:
+        if random.Random(-index - 1).random() < args.manual_share:
+            manual_session(index, recorder, args.timeout)
+        else:
+            questionnaire_session(index, recorder, args.answers_per_rerun, args.timeout)
+        recorder.finished()
+    except Exception as e:
+        recorder.finished(f"session {index}: {type(e).__name__}: {e}")
+
+
+def run_worker(worker, indices, threads, args):
+    """Run these sessions in this process; returns its raw samples and counters"""
+    # Each process is its own replica: its own SQLite primary and the Sheets spool replicating it
+    os.environ["STORAGE_PATH"] = os.path.join(args.workdir, f"responses_{worker}.db")
+    os.environ["SHEETS_SPOOL_PATH"] = os.path.join(args.workdir, f"sheets_spool_{worker}.db")
+    import fakes
+    import metrics
+    connection, smtp_sessions = fakes.install(
+        sheet_latency=args.sheet_latency, smtp_latency=args.smtp_latency, error_rate=args.error_rate
+    )
+
+    recorder = Recorder()
+    with ThreadPoolExecutor(threads) as pool:
+        for index in indices:
+            pool.submit(run_session, index, recorder, args)
+    return {
+        "sessions": recorder.sessions,
+        "errors": recorder.errors,
+        "reruns": recorder.reruns,
+        "submits": recorder.submits,
+        "queued": recorder.queued,
+        "stages": metrics.samples(),
+        "fake_sheet_calls": connection.calls,
+        "emails_sent": sum(len(s.sent) for s in smtp_sessions),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def latency_ms(samples):
+    return {
+        "count": len(samples),
+        "p50": round(percentile(samples, 0.5) * 1000, 1),
+        "p99": round(percentile(samples, 0.99) * 1000, 1),
+        "mean": round(statistics.fmean(samples) * 1000, 1) if samples else 0.0,
+    }
+
+
+def merge_stages(worker_stages):
+    """Per-stage count, failures and p50/p95/p99 in ms over every worker's recent samples"""
+    merged = {}
+    for stages in worker_stages:
+        for stage, s in stages.items():
+            m = merged.setdefault(stage, {"count": 0, "failures": 0, "recent": []})
+            m["count"] += s["count"]
+            m["failures"] += s["failures"]
+            m["recent"] += s["recent"]
+    return {
+        stage: {
+            "count": m["count"],
+            "failures": m["failures"],
+            **{f"p{q}": round(percentile(m["recent"], q / 100) * 1000, 1) for q in (50, 95, 99)},
+        }
+        for stage, m in merged.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the app with simulated concurrent sessions")
+    parser.add_argument("--sessions", type=int, default=100, help="simulated respondents (default: 100)")
+    parser.add_argument("--concurrency", type=int, default=10, help="sessions in flight at once (default: 10)")
+    parser.add_argument("--processes", type=int, default=min(10, os.cpu_count() or 1),
+                        help="worker processes sharing the sessions; 1 models a single replica "
+                             "(default: CPU count, at most 10)")
+    parser.add_argument("--manual-share", type=float, default=0.2,
+                        help="fraction of sessions using manual score input (default: 0.2)")
+    parser.add_argument("--answers-per-rerun", type=int, default=2,
+                        help="radio changes between reruns; 2 is one rerun per question (default: 2)")
+    parser.add_argument("--sheet-latency", type=float, default=0.2, help="seconds per fake Sheets call")
+    parser.add_argument("--smtp-latency", type=float, default=0.5, help="seconds per fake SMTP send")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="chance a fake Sheets call or SMTP send fails")
+    parser.add_argument("--timeout", type=float, default=60, help="seconds allowed per script run")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+    processes = max(1, min(args.processes, args.concurrency, args.sessions))
+
+    # Keep the run's storage, spool and credentials away from the real ones
+    args.workdir = tempfile.mkdtemp(prefix="disc-loadtest-")
+    os.environ.update({
+        "STORAGE_BACKEND": "sqlite+sheets",
+        "SENDER_EMAIL": "loadtest@example.com",
+        "SENDER_PASSWORD": "loadtest",
+        "METRICS_JSON_LOGS": "0",
+    })
+
+    # Deal sessions round-robin and split the concurrency between the processes
+    shares = [list(range(worker, args.sessions, processes)) for worker in range(processes)]
+    threads = [args.concurrency // processes + (worker < args.concurrency % processes)
+               for worker in range(processes)]
+    started = time.perf_counter()
+    # Spawn, not fork: a forked copy of Streamlit's background threads is not safe to use
+    with ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context("spawn")) as pool:
+        workers = list(pool.map(run_worker, range(processes), shares, threads, [args] * processes))
+    elapsed = time.perf_counter() - started
+
+    reruns = [t for w in workers for t in w["reruns"]]
+    submits = [t for w in workers for t in w["submits"]]
+    queued = [t for w in workers for t in w["queued"]]
+    errors = [e for w in workers for e in w["errors"]]
+    report = {
+        "sessions": sum(w["sessions"] for w in workers),
+        "failed_sessions": len(errors),
+        "concurrency": args.concurrency,
+        "processes": processes,
+        "elapsed_s": round(elapsed, 2),
+        "submits_per_s": round(len(submits) / elapsed, 2) if elapsed else 0.0,
+        "reruns_per_s": round(len(reruns) / elapsed, 2) if elapsed else 0.0,
+        "queue_ms": latency_ms(queued),
+        # AppTest reruns the full script; in the browser most reruns are fragment-only
+        "rerun_scope": "app",
+        "rerun_ms": latency_ms(reruns),
+        "submit_ms": latency_ms(submits),
+        # Share of each process's wall time spent running scripts
+        "utilization": round((sum(reruns) + sum(submits)) / (elapsed * processes), 3) if elapsed else 0.0,
+        "peak_rss_mb": round(max(w["peak_rss_mb"] for w in workers), 1),
+        "stages_ms": merge_stages(w["stages"] for w in workers),
+        "fake_sheet_calls": sum(w["fake_sheet_calls"] for w in workers),
+        "emails_sent": sum(w["emails_sent"] for w in workers),
+        "errors": errors[:10],
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{report['sessions']} sessions ({report['failed_sessions']} failed) at concurrency "
+          f"{args.concurrency} over {processes} process(es) in {report['elapsed_s']}s")
+    print(f"  throughput: {report['submits_per_s']} submits/s, {report['reruns_per_s']} reruns/s; "
+          f"utilization {report['utilization']:.0%}")
+    for label, key in (("queue", "queue_ms"), ("rerun", "rerun_ms"), ("submit", "submit_ms")):
+        r = report[key]
+        print(f"  {label:>6}: p50 {r['p50']:>8.1f} ms   p99 {r['p99']:>8.1f} ms   ({r['count']} runs)")
+    print("  (reruns are full-script; fragment reruns in the browser cost less)")
+    print(f"  peak RSS: {report['peak_rss_mb']} MB per process")
+    for stage, s in sorted(report["stages_ms"].items()):
+        print(f"  {stage:>16}: p50 {s['p50']:>8.1f} ms   p99 {s['p99']:>8.1f} ms   "
+              f"({s['count']} runs, {s['failures']} failed)")
+    for error in report["errors"]:
+        print(f"  ! {error}")
+
+
+if __name__ == "__main__":
+    main()
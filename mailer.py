@@ -0,0 +1,186 @@
+import collections
+import heapq
+import itertools
+import os
+import smtplib
+import threading
+import time
+import uuid
+
+import streamlit as st
+
+import metrics
+from runtime import has_secret
+
+# ---------- SMTP settings ----------
+# Override these to point at a local SMTP stand-in (e.g. aiosmtpd) when testing
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "1") != "0"
+SMTP_TIMEOUT = 30
+
+# Gmail drops idle connections after a few minutes, so check with NOOP before reusing one
+SESSION_IDLE_SECONDS = 60
+MAX_ATTEMPTS = 5
+RETRY_BASE_SECONDS = 1
+RETRY_MAX_SECONDS = 60
+# How long the status of a sent or failed email is kept for sessions to read
+STATUS_TTL_SECONDS = int(os.getenv("EMAIL_STATUS_TTL_SECONDS", "3600"))
+
+# Errors that retrying will not fix
+PERMANENT_ERRORS = (smtplib.SMTPAuthenticationError, smtplib.SMTPRecipientsRefused,
+                    smtplib.SMTPSenderRefused, smtplib.SMTPNotSupportedError)
+
+
+def load_email_credentials():
+    """Sender address and password - try Streamlit secrets first, then environment variables"""
+    if has_secret('SENDER_EMAIL'):
+        return st.secrets['SENDER_EMAIL'], st.secrets['SENDER_PASSWORD']
+    return os.getenv("SENDER_EMAIL"), os.getenv("SENDER_PASSWORD")
+
+
+class SMTPSession:
+    """Long-lived authenticated SMTP connection, reopened only when the server drops it"""
+
+    def __init__(self, username, password, host=SMTP_HOST, port=SMTP_PORT, starttls=SMTP_STARTTLS):
+        self.username = username
+        self.password = password
+        self.host = host
+        self.port = port
+        self.starttls = starttls
+        self._server = None
+        self._last_used = 0.0
+
+    def _open(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=SMTP_TIMEOUT)
+        server.ehlo()
+        if self.starttls:
+            server.starttls()
+            # STARTTLS discards what the server advertised before it (RFC 3207), so ask again
+            server.ehlo()
+        if self.password:
+            try:
+                server.login(self.username, self.password)
+            except smtplib.SMTPNotSupportedError:
+                # Local stand-ins often don't offer AUTH
+                pass
+        self._server = server
+
+    def _alive(self):
+        if self._server is None:
+            return False
+        if time.monotonic() - self._last_used < SESSION_IDLE_SECONDS:
+            return True
+        try:
+            return self._server.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def close(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+        self._server = None
+
+    def send(self, msg):
+        """Send one message, reconnecting once if the connection has gone away"""
+        if not self._alive():
+            self.close()
+            self._open()
+        try:
+            self._server.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            self.close()
+            self._open()
+            self._server.send_message(msg)
+        self._last_used = time.monotonic()
+
+
+class EmailOutbox:
+    """Background delivery worker that owns one SMTPSession
+
+    Messages are queued with submit() and sent in order; transient failures
+    are retried with exponential backoff. status() reports progress per
+    message until status_ttl seconds after it was sent or failed.
+    """
+
+    def __init__(self, session, max_attempts=MAX_ATTEMPTS, status_ttl=STATUS_TTL_SECONDS):
+        self.session = session
+        self.max_attempts = max_attempts
+        self.status_ttl = status_ttl
+        self._heap = []
+        self._order = itertools.count()
+        self._statuses = {}
+        # (finished_at, job_id) of sent and failed jobs, oldest first
+        self._finished = collections.deque()
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="email-outbox", daemon=True)
+        self._thread.start()
+
+    def submit(self, msg):
+        """Queue a MIME message for delivery and return its job id"""
+        job_id = uuid.uuid4().hex
+        with self._cond:
+            self._statuses[job_id] = {"state": "queued", "attempts": 0, "error": None,
+                                      "to": msg['To']}
+            heapq.heappush(self._heap, (time.monotonic(), next(self._order), job_id, msg))
+            self._cond.notify()
+        return job_id
+
+    def status(self, job_id):
+        """Delivery status for a job: state is queued, sending, retrying, sent or failed"""
+        with self._cond:
+            status = self._statuses.get(job_id)
+            return dict(status) if status else None
+
+    def pending(self):
+        """Number of messages waiting to be sent"""
+        with self._cond:
+            return len(self._heap)
+
+    def _update(self, job_id, **fields):
+        with self._cond:
+            self._statuses[job_id].update(fields)
+            if fields.get("state") in ("sent", "failed"):
+                now = time.monotonic()
+                self._finished.append((now, job_id))
+                while self._finished and now - self._finished[0][0] > self.status_ttl:
+                    self._statuses.pop(self._finished.popleft()[1], None)
+
+    def _next_job(self):
+        with self._cond:
+            while True:
+                if self._heap:
+                    wait = self._heap[0][0] - time.monotonic()
+                    if wait <= 0:
+                        return heapq.heappop(self._heap)
+                    self._cond.wait(wait)
+                else:
+                    self._cond.wait()
+
+    def _run(self):
+        while True:
+            _, _, job_id, msg = self._next_job()
+            attempts = self.status(job_id)["attempts"] + 1
+            self._update(job_id, state="sending", attempts=attempts)
+            try:
+                with metrics.span("email_send", job=job_id):
+                    self.session.send(msg)
+                self._update(job_id, state="sent", error=None)
+            except Exception as e:
+                self.session.close()
+                if isinstance(e, PERMANENT_ERRORS) or attempts >= self.max_attempts:
+                    self._update(job_id, state="failed", error=str(e))
+                    continue
+                delay = min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS)
+                self._update(job_id, state="retrying", error=str(e))
+                with self._cond:
+                    heapq.heappush(self._heap, (time.monotonic() + delay, next(self._order), job_id, msg))
+
+
+@st.cache_resource
+def get_email_outbox(sender_email, sender_password):
+    """Shared EmailOutbox per sender for the whole Streamlit process"""
+    return EmailOutbox(SMTPSession(sender_email, sender_password))
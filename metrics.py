@@ -0,0 +1,208 @@
+"""Per-stage latency and outcome metrics for the submit pipeline
+
+Wrap a stage in span() to time it, count its successes and failures, and
+write one JSON log line per run:
+
+    with metrics.span("chart"):
+        img_bytes = draw_disc_chart(...)
+
+Metrics are kept per process and exposed in the Prometheus text format by
+exposition(), together with any counters other modules add through
+register_collector(); set METRICS_PORT to also serve them at /metrics from a side
+HTTP server.
+"""
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger("disc.metrics")
+
+# Histogram bucket upper bounds in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUANTILES = (0.5, 0.95, 0.99)
+# Quantiles are computed over this many of the most recent runs per stage
+WINDOW = int(os.getenv("METRICS_WINDOW", "1000"))
+METRICS_PORT = os.getenv("METRICS_PORT")
+# Write each span as a JSON line on stderr; set to 0 to leave logging to the host app
+JSON_LOGS = os.getenv("METRICS_JSON_LOGS", "1") == "1"
+
+if JSON_LOGS and not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+class StageMetrics:
+    """Duration histogram, recent-sample window and outcome counts for one stage"""
+
+    def __init__(self):
+        self.bucket_counts = [0] * (len(BUCKETS) + 1)
+        self.total_seconds = 0.0
+        self.count = 0
+        self.outcomes = {"success": 0, "failure": 0}
+        self.recent = deque(maxlen=WINDOW)
+
+    def observe(self, seconds, outcome):
+        self.bucket_counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.total_seconds += seconds
+        self.count += 1
+        self.outcomes[outcome] += 1
+        self.recent.append(seconds)
+
+    def quantiles(self):
+        samples = sorted(self.recent)
+        if not samples:
+            return {q: 0.0 for q in QUANTILES}
+        return {q: samples[min(len(samples) - 1, int(q * len(samples)))] for q in QUANTILES}
+
+
+class Metrics:
+    """Thread-safe registry of StageMetrics by stage name"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = {}
+
+    def observe(self, stage, seconds, outcome):
+        with self._lock:
+            self._stages.setdefault(stage, StageMetrics()).observe(seconds, outcome)
+
+    def summary(self):
+        """{stage: {"count", "failures", "p50", "p95", "p99"}} with latencies in ms"""
+        with self._lock:
+            result = {}
+            for stage, m in self._stages.items():
+                q = m.quantiles()
+                result[stage] = {
+                    "count": m.count,
+                    "failures": m.outcomes["failure"],
+                    **{f"p{round(k * 100)}": round(v * 1000, 1) for k, v in q.items()},
+                }
+            return result
+
+    def samples(self):
+        """{stage: {"count", "failures", "recent"}} with the recent durations in seconds"""
+        with self._lock:
+            return {
+                stage: {"count": m.count, "failures": m.outcomes["failure"], "recent": list(m.recent)}
+                for stage, m in self._stages.items()
+            }
+
+    def exposition(self):
+        """All stages in the Prometheus text exposition format"""
+        lines = [
+            "# HELP disc_stage_duration_seconds Time spent in each submit stage.",
+            "# TYPE disc_stage_duration_seconds histogram",
+        ]
+        with self._lock:
+            stages = sorted(self._stages.items())
+            for stage, m in stages:
+                cumulative = 0
+                for bound, count in zip(BUCKETS + ("+Inf",), m.bucket_counts):
+                    cumulative += count
+                    lines.append(f'disc_stage_duration_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'disc_stage_duration_seconds_sum{{stage="{stage}"}} {m.total_seconds:.6f}')
+                lines.append(f'disc_stage_duration_seconds_count{{stage="{stage}"}} {m.count}')
+
+            lines += [
+                f"# HELP disc_stage_duration_quantile_seconds Latency quantiles over the last {WINDOW} runs.",
+                "# TYPE disc_stage_duration_quantile_seconds gauge",
+            ]
+            for stage, m in stages:
+                for q, value in m.quantiles().items():
+                    lines.append(f'disc_stage_duration_quantile_seconds{{stage="{stage}",quantile="{q}"}} {value:.6f}')
+
+            lines += [
+                "# HELP disc_stage_runs_total Stage runs by outcome.",
+                "# TYPE disc_stage_runs_total counter",
+            ]
+            for stage, m in stages:
+                for outcome, count in m.outcomes.items():
+                    lines.append(f'disc_stage_runs_total{{stage="{stage}",outcome="{outcome}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Metrics()
+
+# Other modules' counters (e.g. the chart cache), each a callable returning exposition lines
+_collectors = []
+
+
+def register_collector(collect):
+    """Append collect()'s lines to exposition(); modules register themselves on import"""
+    if collect not in _collectors:
+        _collectors.append(collect)
+
+
+@contextmanager
+def span(stage, **fields):
+    """Time the block as one run of stage; exceptions count as failures and are re-raised"""
+    started = time.perf_counter()
+    outcome, error = "success", None
+    try:
+        yield
+    except BaseException as e:
+        outcome, error = "failure", f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        REGISTRY.observe(stage, elapsed, outcome)
+        event = {"event": "stage", "stage": stage, "outcome": outcome,
+                 "duration_ms": round(elapsed * 1000, 2), **fields}
+        if error:
+            event["error"] = error
+        logger.info(json.dumps(event, default=str))
+
+
+def exposition():
+    lines = [line for collect in list(_collectors) for line in collect()]
+    return REGISTRY.exposition() + "".join(f"{line}\n" for line in lines)
+
+
+def summary():
+    return REGISTRY.summary()
+
+
+def samples():
+    return REGISTRY.samples()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = exposition().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_server(port=METRICS_PORT):
+    """Serve /metrics on port from a daemon thread; once per process, no-op without a port"""
+    global _server
+    if not port:
+        return None
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer(("0.0.0.0", int(port)), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+            logger.info(json.dumps({"event": "metrics_server", "port": int(port)}))
+    return _server
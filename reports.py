@@ -0,0 +1,239 @@
+import functools
+import importlib.util
+import io
+import os
+from email.mime.image import MIMEImage
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from PIL import Image, ImageDraw, ImageFont
+
+
+# ---------- Fonts ----------
+def font_candidates():
+    """TrueType fonts to try, in order of preference"""
+    candidates = []
+    if os.getenv("DISC_FONT_PATH"):
+        candidates.append(os.getenv("DISC_FONT_PATH"))
+    candidates += [
+        "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",  # Debian/Ubuntu
+        "/usr/share/fonts/dejavu-sans-fonts/DejaVuSans.ttf",  # Fedora
+        "/usr/share/fonts/dejavu/DejaVuSans.ttf",  # RHEL/CentOS
+        "/usr/share/fonts/TTF/DejaVuSans.ttf",  # Arch
+        "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
+        "/System/Library/Fonts/Helvetica.ttc",  # macOS
+        "C:/Windows/Fonts/arial.ttf",
+    ]
+    # matplotlib is a dependency and always bundles DejaVu Sans
+    spec = importlib.util.find_spec("matplotlib")
+    if spec and spec.submodule_search_locations:
+        mpl_dir = list(spec.submodule_search_locations)[0]
+        candidates.append(os.path.join(mpl_dir, "mpl-data", "fonts", "ttf", "DejaVuSans.ttf"))
+    return candidates
+
+
+@functools.lru_cache(maxsize=None)
+def resolve_font_path():
+    """First usable TrueType font on this host, or None; looked up once per process"""
+    for path in font_candidates():
+        if not os.path.exists(path):
+            continue
+        try:
+            ImageFont.truetype(path, 12)
+        except OSError:
+            continue
+        return path
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def get_font(size):
+    """Font at the given size, loaded once per process; falls back to Pillow's default"""
+    path = resolve_font_path()
+    if path is None:
+        return ImageFont.load_default()
+    return ImageFont.truetype(path, size)
+
+
+# ---------- Scores image ----------
+def create_scores_image(name, most_scores, least_scores, comp_scores):
+    """Create an image of the DISC scores table"""
+    # Create image
+    img_width = 800
+    img_height = 400
+    img = Image.new('RGB', (img_width, img_height), color='white')
+    draw = ImageDraw.Draw(img)
+    
+    title_font = get_font(40)
+    header_font = get_font(28)
+    score_font = get_font(24)
+    
+    # Draw title
+    draw.text((50, 30), "Your DISC Scores", font=title_font, fill='black')
+    
+    # Column headers
+    y_pos = 120
+    draw.text((50, y_pos), "MOST (Projected)", font=header_font, fill='black')
+    draw.text((300, y_pos), "LEAST (Private)", font=header_font, fill='black')
+    draw.text((550, y_pos), "COMPOSITE (Public)", font=header_font, fill='black')
+    
+    # Draw scores
+    y_start = 180
+    spacing = 50
+    for i, letter in enumerate(['D', 'I', 'S', 'C']):
+        y = y_start + (i * spacing)
+        draw.text((50, y), f"{letter}: {most_scores[letter]}", font=score_font, fill='black')
+        draw.text((300, y), f"{letter}: {least_scores[letter]}", font=score_font, fill='black')
+        comp_val = comp_scores[letter]
+        draw.text((550, y), f"{letter}: {comp_val:+d}", font=score_font, fill='black')
+    
+    # Save to bytes
+    img_bytes = io.BytesIO()
+    img.save(img_bytes, format='PNG')
+    img_bytes.seek(0)
+    return img_bytes.getvalue()
+
+
+# ---------- Attachment budget ----------
+# Total size of the image attachments once base64-encoded, as sent over SMTP
+ATTACHMENT_BUDGET_BYTES = int(os.getenv("EMAIL_ATTACHMENT_BUDGET_BYTES", "300000"))
+# Both images are mostly flat colour, so a small palette loses next to nothing
+ATTACHMENT_PALETTE_COLORS = int(os.getenv("EMAIL_PALETTE_COLORS", "64"))
+# Send the scores table and chart as one stacked image instead of two
+MERGE_ATTACHMENTS = os.getenv("EMAIL_MERGE_ATTACHMENTS", "0") == "1"
+# Shrink by this factor per step when over budget, but never below MIN_SCALE
+DOWNSCALE_STEP = 0.8
+MIN_SCALE = 0.3
+
+
+def encoded_size(data):
+    """Bytes on the wire for data as a base64 MIME part (76-char lines plus CRLF)"""
+    b64 = 4 * -(-len(data) // 3)
+    return b64 + 2 * -(-b64 // 76)
+
+
+def encode_palette_png(img, colors=ATTACHMENT_PALETTE_COLORS):
+    """Palette-quantize an image without dithering and encode it as a PNG
+
+    Fast octree quantization and default zlib effort keep this to tens of
+    milliseconds; median cut and optimize=True cost ~5x more for ~10% smaller files.
+    """
+    paletted = img.convert("RGB").quantize(colors, method=Image.Quantize.FASTOCTREE, dither=Image.Dither.NONE)
+    buf = io.BytesIO()
+    paletted.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def merge_images(top, bottom):
+    """Stack two images vertically, centred on white"""
+    width = max(top.width, bottom.width)
+    merged = Image.new("RGB", (width, top.height + bottom.height), "white")
+    merged.paste(top, ((width - top.width) // 2, 0))
+    merged.paste(bottom, ((width - bottom.width) // 2, top.height))
+    return merged
+
+
+def prepare_attachments(scores_img, chart_bytes, budget=ATTACHMENT_BUDGET_BYTES,
+                        colors=ATTACHMENT_PALETTE_COLORS, merge=MERGE_ATTACHMENTS):
+    """[(filename, image_bytes)] for the results email, shrunk to fit within budget
+
+    Images are palette-quantized first; if the encoded total is still over
+    budget, they are downscaled step by step down to MIN_SCALE. Anything that
+    is not a raster image (the "vector" chart profile) is attached unchanged
+    as .svg and does not shrink.
+    """
+    originals = []
+    for stem, data in (("disc_scores", scores_img), ("disc_chart", chart_bytes)):
+        try:
+            with Image.open(io.BytesIO(data)) as img:
+                originals.append((f"{stem}.png", img.convert("RGB")))
+        except OSError:
+            originals.append((f"{stem}.svg", data))
+    if merge and all(isinstance(img, Image.Image) for _, img in originals):
+        originals = [("disc_results.png", merge_images(originals[0][1], originals[1][1]))]
+
+    scale = 1.0
+    while True:
+        attachments = []
+        for filename, img in originals:
+            if not isinstance(img, Image.Image):
+                attachments.append((filename, img))
+                continue
+            if scale < 1.0:
+                img = img.resize((round(img.width * scale), round(img.height * scale)), Image.LANCZOS)
+            attachments.append((filename, encode_palette_png(img, colors)))
+        total = sum(encoded_size(data) for _, data in attachments)
+        if total <= budget or scale * DOWNSCALE_STEP < MIN_SCALE:
+            return attachments
+        scale *= DOWNSCALE_STEP
+
+
+# ---------- Results email ----------
+def build_results_message(sender_email, recipient_email, name, most_scores, least_scores, comp_scores,
+                          scores_img, chart_bytes):
+    """Assemble the results email with the scores image and chart attached"""
+    # Create message
+    msg = MIMEMultipart()
+    msg['From'] = sender_email
+    msg['To'] = recipient_email
+    msg['Subject'] = f"Your DISC Assessment Results - {name}"
+    
+    # Email body (HTML format for better styling)
+    body = f"""
+<html>
+<body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+    <h2>Hello {name},</h2>
+    
+    <p>Thank you for completing the DISC Personality Assessment!</p>
+    
+    <p>Please find your results attached:</p>
+    <ol>
+        <li>Your DISC Scores Summary</li>
+        <li>Your Complete DISC Profile Chart</li>
+    </ol>
+    
+    <h3 style="margin-top: 30px;">Your scores are:</h3>
+    
+    <div style="margin: 20px 0;">
+        <p><strong>MOST (Projected Concept):</strong></p>
+        <ul style="list-style: none; padding-left: 20px;">
+            <li><strong>D:</strong> {most_scores['D']}</li>
+            <li><strong>I:</strong> {most_scores['I']}</li>
+            <li><strong>S:</strong> {most_scores['S']}</li>
+            <li><strong>C:</strong> {most_scores['C']}</li>
+        </ul>
+    </div>
+    
+    <div style="margin: 20px 0;">
+        <p><strong>LEAST (Private Concept):</strong></p>
+        <ul style="list-style: none; padding-left: 20px;">
+            <li><strong>D:</strong> {least_scores['D']}</li>
+            <li><strong>I:</strong> {least_scores['I']}</li>
+            <li><strong>S:</strong> {least_scores['S']}</li>
+            <li><strong>C:</strong> {least_scores['C']}</li>
+        </ul>
+    </div>
+    
+    <div style="margin: 20px 0;">
+        <p><strong>COMPOSITE (Public Concept):</strong></p>
+        <ul style="list-style: none; padding-left: 20px;">
+            <li><strong>D:</strong> {comp_scores['D']:+d}</li>
+            <li><strong>I:</strong> {comp_scores['I']:+d}</li>
+            <li><strong>S:</strong> {comp_scores['S']:+d}</li>
+            <li><strong>C:</strong> {comp_scores['C']:+d}</li>
+        </ul>
+    </div>
+    
+    <p style="margin-top: 30px;">Best regards,<br>
+    <strong>Mira!</strong></p>
+</body>
+</html>
+"""
+    msg.attach(MIMEText(body, 'html'))
+    
+    # Attach the scores image and chart, optimized to fit the attachment budget
+    for filename, data in prepare_attachments(scores_img, chart_bytes):
+        attachment = MIMEImage(data, _subtype="svg+xml" if filename.endswith(".svg") else "png")
+        attachment.add_header('Content-Disposition', 'attachment', filename=filename)
+        msg.attach(attachment)
+    return msg
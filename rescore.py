@@ -0,0 +1,147 @@
+"""Re-score historical responses from their stored answers
+
+Reads every stored response in one go, re-scores each one that has all 48
+answers with the current questions mapping, and reports responses whose
+stored scores disagree. The SQLite primary and the response sheet are
+checked in turn (just the one the configured STORAGE_BACKEND uses, if it
+uses one); with --write, each gets its corrected scores in a single batch,
+so the two stores stay in agreement. Running apps pick up corrected scores
+in the admin analytics after a restart.
+
+    python rescore.py                 # report only
+    python rescore.py --write         # also fix the stored scores
+    python rescore.py --csv export.csv
+"""
+import argparse
+import csv
+import time
+
+import numpy as np
+from gspread.utils import rowcol_to_a1
+
+from scoring import questions, encode_answer_table, score_batch
+from storage import (FIRST_ANSWER_COL, FIRST_SCORE_COL, SCORE_COLUMNS, STORAGE_BACKEND, STORAGE_PATH,
+                     is_header_row)
+
+N_QUESTIONS = len(questions)
+LAST_COL = FIRST_ANSWER_COL + 2 * N_QUESTIONS
+MISSING = np.iinfo(np.int64).min
+
+
+def parse_int(value):
+    try:
+        return int(str(value).strip())
+    except ValueError:
+        return MISSING
+
+
+def split_header(values):
+    """Drop a header row if there is one; returns (rows, sheet row number of the first)"""
+    if values and is_header_row(values[0]):
+        return values[1:], 2
+    return values, 1
+
+
+def rescore_rows(values):
+    """Re-score sheet rows; returns (row_indices, stored, recomputed) for scoreable rows
+
+    stored and recomputed are (N, 12) arrays in SCORE_COLUMNS order; rows with
+    missing or unrecognised answers (e.g. manual score entries) are skipped.
+    """
+    padded = [(row + [""] * LAST_COL)[:LAST_COL] for row in values]
+    if not padded:
+        empty = np.zeros((0, len(SCORE_COLUMNS)), dtype=int)
+        return np.zeros(0, dtype=int), empty, empty
+    table = np.array(padded, dtype=object)
+    answers = table[:, FIRST_ANSWER_COL:LAST_COL]
+    most_idx, least_idx = encode_answer_table(answers[:, 0::2], answers[:, 1::2])
+    scoreable = np.flatnonzero((most_idx >= 0).all(axis=1) & (least_idx >= 0).all(axis=1))
+
+    stored_cells = table[scoreable, FIRST_SCORE_COL:FIRST_ANSWER_COL]
+    stored = np.array([[parse_int(v) for v in row] for row in stored_cells], dtype=np.int64)
+    stored = stored.reshape(len(scoreable), len(SCORE_COLUMNS))
+    most, least, comp = score_batch(most_idx[scoreable], least_idx[scoreable])
+    recomputed = np.hstack([most, least, comp])
+    return scoreable, stored, recomputed
+
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.reader(f))
+
+
+def report(label, rows, row_names, show):
+    """Re-score rows, print the mismatches, and return [(row index, corrected scores)]"""
+    started = time.perf_counter()
+    scoreable, stored, recomputed = rescore_rows(rows)
+    mismatched = np.flatnonzero((stored != recomputed).any(axis=1))
+    score_time = time.perf_counter() - started
+
+    print(f"{label}: re-scored {len(scoreable)} of {len(rows)} rows in {score_time:.3f}s "
+          f"({len(rows) - len(scoreable)} without full answers)")
+    print(f"{len(mismatched)} rows have stored scores that disagree")
+    for i in mismatched[:show]:
+        row = rows[scoreable[i]]
+        changes = ", ".join(
+            f"{col} {'?' if old == MISSING else old}->{new}"
+            for col, old, new in zip(SCORE_COLUMNS, stored[i], recomputed[i]) if old != new
+        )
+        print(f"  {row_names[scoreable[i]]}: {row[1]} <{row[2]}>: {changes}")
+    return [(int(scoreable[i]), recomputed[i].tolist()) for i in mismatched]
+
+
+def rescore_sqlite(args):
+    from storage import SQLiteStorage
+
+    storage = SQLiteStorage(STORAGE_PATH)
+    ids, rows = storage.rows()
+    fixes = report(f"SQLite {STORAGE_PATH}", rows, [f"id {row_id}" for row_id in ids], args.show)
+    if args.write and fixes:
+        storage.update_scores([(ids[i], scores) for i, scores in fixes])
+        print(f"Wrote corrected scores for {len(fixes)} SQLite rows")
+    storage.close()
+
+
+def rescore_sheet(args):
+    from sheets import SheetConnection
+
+    started = time.perf_counter()
+    connection = SheetConnection()
+    end = rowcol_to_a1(1, LAST_COL).rstrip("1")
+    rows, first_row = split_header(connection.run(lambda ws: ws.get(f"A1:{end}")))
+    print(f"Read {len(rows)} sheet rows in {time.perf_counter() - started:.2f}s")
+    fixes = report("Sheet", rows, [f"row {i + first_row}" for i in range(len(rows))], args.show)
+    if args.write and fixes:
+        updates = []
+        for i, scores in fixes:
+            sheet_row = i + first_row
+            start = rowcol_to_a1(sheet_row, FIRST_SCORE_COL + 1)
+            stop = rowcol_to_a1(sheet_row, FIRST_ANSWER_COL)
+            updates.append({"range": f"{start}:{stop}", "values": [scores]})
+        connection.run(lambda ws: ws.batch_update(updates))
+        print(f"Wrote corrected scores for {len(updates)} sheet rows")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score stored DISC responses")
+    parser.add_argument("--csv", help="check a CSV export instead of the configured storage")
+    parser.add_argument("--write", action="store_true",
+                        help="write corrected scores back to SQLite and the sheet")
+    parser.add_argument("--show", type=int, default=20,
+                        help="how many mismatched rows to print per store (default 20)")
+    args = parser.parse_args()
+    if args.csv and args.write:
+        parser.error("--write updates the configured storage and cannot be used with --csv")
+
+    if args.csv:
+        rows, first_row = split_header(read_csv(args.csv))
+        report(args.csv, rows, [f"row {i + first_row}" for i in range(len(rows))], args.show)
+        return
+    if STORAGE_BACKEND.startswith("sqlite"):
+        rescore_sqlite(args)
+    if STORAGE_BACKEND.endswith("sheets"):
+        rescore_sheet(args)
+
+
+if __name__ == "__main__":
+    main()
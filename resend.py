@@ -0,0 +1,262 @@
+"""Re-send result emails to past respondents as a campaign
+
+Selects submissions from storage by date and by their status in the
+campaign, regenerates the chart and scores attachments, and sends them over
+a small pool of long-lived SMTP sessions (one by default) with a cap on
+concurrent workers and a steady per-minute pace. Every outcome is
+checkpointed to SQLite, so an interrupted campaign resumes where it left
+off when started again with the same --campaign name.
+
+    python resend.py --campaign oct-workshop --since 2026-10-01 --until 2026-10-02 --dry-run
+    python resend.py --campaign oct-workshop --since 2026-10-01 --until 2026-10-02
+    python resend.py --campaign oct-workshop --status failed     # retry failures only
+
+Against a local sink instead of the real provider:
+
+    python fakes.py smtp-sink --port 1025 --auth &
+    SMTP_HOST=127.0.0.1 SMTP_PORT=1025 SMTP_STARTTLS=0 python resend.py --campaign test
+"""
+import argparse
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import matplotlib
+matplotlib.use("Agg")
+
+from storage import SCORE_COLUMNS, create_storage, submission_id
+
+CHECKPOINT_PATH = os.getenv("RESEND_CHECKPOINT_PATH", "resend_checkpoint.db")
+STATES = ("pending", "sent", "failed")
+MAX_ATTEMPTS = 3
+RETRY_BASE_SECONDS = 2
+
+
+class Checkpoint:
+    """Per-campaign delivery state of each submission, committed after every send"""
+
+    def __init__(self, path=CHECKPOINT_PATH):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS deliveries ("
+            "campaign TEXT NOT NULL, submission_id TEXT NOT NULL, email TEXT NOT NULL, "
+            "state TEXT NOT NULL, attempts INTEGER NOT NULL, error TEXT, updated_at REAL NOT NULL, "
+            "PRIMARY KEY (campaign, submission_id))"
+        )
+        self._db.commit()
+
+    def states(self, campaign):
+        """{submission_id: state} for everything this campaign has tried"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT submission_id, state FROM deliveries WHERE campaign = ?", (campaign,)
+            ).fetchall()
+        return dict(rows)
+
+    def record(self, campaign, sub_id, email, state, attempts, error=None):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO deliveries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (campaign, sub_id, email, state, attempts, error, time.time()),
+            )
+            self._db.commit()
+
+    def summary(self, campaign):
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT state, COUNT(*) FROM deliveries WHERE campaign = ? GROUP BY state", (campaign,)
+            ).fetchall()
+        return dict(rows)
+
+
+def select_submissions(records, campaign_states, since=None, until=None, statuses=("pending", "failed"),
+                       emails=None, all_submissions=False):
+    """[(submission_id, record)] to send, oldest first
+
+    since/until are inclusive YYYY-MM-DD dates. Unless all_submissions, only
+    the latest submission per email address is kept.
+    """
+    selected = {}
+    for record in records:
+        email = str(record.get("email", "")).strip()
+        day = str(record.get("submitted_at", ""))[:10]
+        if not email or (since and day < since) or (until and day > until):
+            continue
+        if emails and email.lower() not in emails:
+            continue
+        sub_id = submission_id(record)
+        if campaign_states.get(sub_id, "pending") not in statuses:
+            continue
+        key = sub_id if all_submissions else email.lower()
+        # Records come oldest first, so a later one replaces an earlier one
+        selected[key] = (sub_id, record)
+    return list(selected.values())
+
+
+def record_scores(record):
+    """(most, least, comp) score dicts from a stored record"""
+    values = {col: int(record[col]) for col in SCORE_COLUMNS}
+    return tuple(
+        {trait: values[f"{kind}_{trait.lower()}"] for trait in "DISC"}
+        for kind in ("most", "least", "comp")
+    )
+
+
+def build_message(record, sender_email):
+    """The results email for a stored submission, with freshly rendered attachments"""
+    import charts
+    from reports import build_results_message, create_scores_image
+
+    most, least, comp = record_scores(record)
+    chart_bytes = charts.draw_disc_chart(most, least, comp, charts.disc_config, "email")
+    scores_img = create_scores_image(record["name"], most, least, comp)
+    return build_results_message(sender_email, record["email"], record["name"], most, least, comp,
+                                 scores_img, chart_bytes)
+
+
+class Pacer:
+    """Spaces sends at least 60/per_minute seconds apart across all workers"""
+
+    def __init__(self, per_minute):
+        self.interval = 60 / per_minute if per_minute else 0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class SessionPool:
+    """A fixed set of SMTP sessions lent to one worker at a time"""
+
+    def __init__(self, size, factory):
+        self.sessions = [factory() for _ in range(size)]
+        self._free = queue.Queue()
+        for session in self.sessions:
+            self._free.put(session)
+
+    def send(self, msg):
+        session = self._free.get()
+        try:
+            session.send(msg)
+        except Exception:
+            session.close()
+            raise
+        finally:
+            self._free.put(session)
+
+    def close(self):
+        for session in self.sessions:
+            session.close()
+
+
+def deliver(sub_id, record, campaign, checkpoint, pool, pacer, sender_email):
+    """Build and send one submission's email, retrying transient failures; returns the final state"""
+    from mailer import PERMANENT_ERRORS
+
+    error = None
+    try:
+        msg = build_message(record, sender_email)
+    except Exception as e:
+        checkpoint.record(campaign, sub_id, record["email"], "failed", 0, f"build: {type(e).__name__}: {e}")
+        return "failed"
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        pacer.wait()
+        try:
+            pool.send(msg)
+            checkpoint.record(campaign, sub_id, record["email"], "sent", attempt)
+            return "sent"
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            if isinstance(e, PERMANENT_ERRORS) or attempt == MAX_ATTEMPTS:
+                break
+            time.sleep(RETRY_BASE_SECONDS * 2 ** (attempt - 1))
+    checkpoint.record(campaign, sub_id, record["email"], "failed", attempt, error)
+    return "failed"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-send DISC result emails to past respondents")
+    parser.add_argument("--campaign", required=True, help="campaign name; rerun with the same name to resume")
+    parser.add_argument("--since", help="first submission date to include (YYYY-MM-DD)")
+    parser.add_argument("--until", help="last submission date to include (YYYY-MM-DD)")
+    parser.add_argument("--status", default="pending,failed",
+                        help="comma-separated campaign states to send: pending, failed, sent "
+                             "(default: pending,failed)")
+    parser.add_argument("--email", action="append", help="only this address (repeatable)")
+    parser.add_argument("--all-submissions", action="store_true",
+                        help="send every matching submission, not just the latest per address")
+    parser.add_argument("--source", choices=["sqlite", "csv", "sheets"], default="sqlite",
+                        help="storage to read submissions from (default: sqlite)")
+    parser.add_argument("--concurrency", type=int, default=2, help="worker threads (default: 2)")
+    parser.add_argument("--connections", type=int, default=1, help="SMTP sessions to share (default: 1)")
+    parser.add_argument("--per-minute", type=float, default=20,
+                        help="maximum sends per minute across all workers (default: 20)")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH, help="checkpoint database")
+    parser.add_argument("--dry-run", action="store_true", help="list what would be sent and stop")
+    args = parser.parse_args()
+
+    statuses = tuple(s.strip() for s in args.status.split(","))
+    unknown = set(statuses) - set(STATES)
+    if unknown:
+        parser.error(f"unknown status: {', '.join(sorted(unknown))}")
+
+    checkpoint = Checkpoint(args.checkpoint)
+    records = create_storage(args.source).records()
+    emails = {e.strip().lower() for e in args.email} if args.email else None
+    selected = select_submissions(records, checkpoint.states(args.campaign), args.since, args.until,
+                                  statuses, emails, args.all_submissions)
+    print(f"{len(selected)} of {len(records)} submissions selected for campaign {args.campaign!r}")
+    if args.dry_run:
+        for sub_id, record in selected:
+            print(f"  {record['submitted_at']}  {record['email']:<40} {sub_id[:12]}")
+        return
+    if not selected:
+        return
+
+    from mailer import SMTPSession, load_email_credentials
+
+    sender_email, sender_password = load_email_credentials()
+    if not sender_email:
+        parser.error("SENDER_EMAIL is not configured")
+    pool = SessionPool(args.connections, lambda: SMTPSession(sender_email, sender_password))
+    pacer = Pacer(args.per_minute)
+
+    counts = Counter()
+    started = time.perf_counter()
+    executor = ThreadPoolExecutor(args.concurrency)
+    try:
+        futures = [
+            executor.submit(deliver, sub_id, record, args.campaign, checkpoint, pool, pacer, sender_email)
+            for sub_id, record in selected
+        ]
+        for done, future in enumerate(futures, 1):
+            counts[future.result()] += 1
+            if done % 10 == 0 or done == len(futures):
+                print(f"{done}/{len(futures)} done ({counts['sent']} sent, {counts['failed']} failed)")
+    except KeyboardInterrupt:
+        # Finish the sends in flight, drop the rest; they stay pending for the next run
+        executor.shutdown(wait=True, cancel_futures=True)
+        print("Interrupted; rerun the same command to resume")
+        raise
+    finally:
+        executor.shutdown(wait=True)
+        pool.close()
+    elapsed = time.perf_counter() - started
+    print(f"Sent {counts['sent']}, failed {counts['failed']} in {elapsed:.1f}s; "
+          f"campaign totals: {checkpoint.summary(args.campaign)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Process-level helpers: secrets lookup, lazy subsystem loading and cold-start timings
+
+The heavy subsystems (charts, Google Sheets, email, images) are only imported
+the first time a request needs them; load_subsystem() records how long each
+took and the /metrics output reports it as disc_subsystem_import_seconds. Run this file to measure the cold import cost of every subsystem in a
+fresh interpreter:
+
+    python runtime.py                  # table of import times
+    python runtime.py --budget-ms 1500 # exit 1 if the app's startup exceeds this
+"""
+import argparse
+import importlib
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import streamlit as st
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Modules each subsystem pulls in; "core" is what every script run needs
+SUBSYSTEMS = {
+    "core": ["streamlit", "dotenv", "metrics", "scoring"],
+    "charts": ["charts"],
+    "sheets": ["sheets"],
+    "storage": ["storage"],
+    "email": ["mailer"],
+    "images": ["reports"],
+    "analytics": ["analytics"],
+}
+
+_timings = {}
+_loaded = set()
+_timings_lock = threading.Lock()
+
+
+def has_secret(key):
+    """True if key is in Streamlit secrets; command-line tools may have no secrets file"""
+    try:
+        return hasattr(st, 'secrets') and key in st.secrets
+    except FileNotFoundError:
+        return False
+
+
+def load_subsystem(name):
+    """Import a subsystem's main module on first use and record how long it took"""
+    module_name = SUBSYSTEMS[name][-1]
+    # Only trust sys.modules once the import has finished; while another session is
+    # still importing, import_module() waits for it instead of returning a partial module
+    if name in _loaded:
+        return sys.modules[module_name]
+    importing = module_name not in sys.modules
+    started = time.perf_counter()
+    module = importlib.import_module(module_name)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    with _timings_lock:
+        if importing:
+            _timings.setdefault(name, elapsed_ms)
+        _loaded.add(name)
+    if importing:
+        logger.info("Loaded %s subsystem in %.0f ms", name, elapsed_ms)
+    return module
+
+
+def import_timings():
+    """Milliseconds spent importing each subsystem loaded so far in this process"""
+    with _timings_lock:
+        return dict(_timings)
+
+
+def timings_exposition():
+    """Subsystem import times in the Prometheus text format, for the /metrics output"""
+    lines = [
+        "# HELP disc_subsystem_import_seconds Time this process spent importing each lazy subsystem.",
+        "# TYPE disc_subsystem_import_seconds gauge",
+    ]
+    for name, ms in sorted(import_timings().items()):
+        lines.append(f'disc_subsystem_import_seconds{{subsystem="{name}"}} {ms / 1000:.6f}')
+    return lines
+
+
+metrics.register_collector(timings_exposition)
+
+
+def measure_cold_imports():
+    """Import each subsystem in a fresh interpreter; returns {subsystem: ms}"""
+    results = {}
+    # Run from this directory so the app's own modules import whatever the caller's cwd
+    here = os.path.dirname(os.path.abspath(__file__))
+    for name, modules in SUBSYSTEMS.items():
+        # Import core first (except when measuring core) so each row is the extra cost
+        prelude = "" if name == "core" else "".join(f"import {m}; " for m in SUBSYSTEMS["core"])
+        code = (
+            f"{prelude}import time; t = time.perf_counter(); "
+            + "".join(f"import {m}; " for m in modules)
+            + "print((time.perf_counter() - t) * 1000)"
+        )
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                             cwd=here)
+        results[name] = float(out.stdout.strip().splitlines()[-1])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold-start import time per subsystem")
+    parser.add_argument("--budget-ms", type=float,
+                        help="fail if the core (every-request) import time exceeds this")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = measure_cold_imports()
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for name, ms in results.items():
+            lazy = "" if name == "core" else "  (lazy)"
+            print(f"{name:>8}: {ms:8.1f} ms{lazy}")
+    if args.budget_ms is not None and results["core"] > args.budget_ms:
+        print(f"Core startup {results['core']:.0f} ms is over the {args.budget_ms:.0f} ms budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
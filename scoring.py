@@ -0,0 +1,177 @@
+from collections import namedtuple
+from types import MappingProxyType
+
+import numpy as np
+
+TRAITS = ["D", "I", "S", "C"]
+
+# ---------- DISC Questions Mapping ----------
+# Each option maps to D, I, S, or C
+questions = [
+    {"most": ["EXPRESSIVE", "COMPLIANT", "FORCEFUL", "RESTRAINED"], 
+     "least": ["EXPRESSIVE", "COMPLIANT", "FORCEFUL", "RESTRAINED"],
+     "mapping": ["I", "C", "D", "S"]},
+    {"most": ["STRONG MINDED", "CAREFUL", "EMOTIONAL", "SATISFIED"],
+     "least": ["STRONG MINDED", "CAREFUL", "EMOTIONAL", "SATISFIED"],
+     "mapping": ["D", "C", "I", "S"]},
+    {"most": ["CORRECT", "PIONEERING", "CALM", "INFLUENTIAL"],
+     "least": ["CORRECT", "PIONEERING", "CALM", "INFLUENTIAL"],
+     "mapping": ["C", "D", "S", "I"]},
+    {"most": ["PRECISE", "DOMINEERING", "WILLING", "ATTRACTIVE"],
+     "least": ["PRECISE", "DOMINEERING", "WILLING", "ATTRACTIVE"],
+     "mapping": ["C", "D", "S", "I"]},
+    {"most": ["EVEN-TEMPERED", "STIMULATING", "METICULOUS", "DETERMINED"],
+     "least": ["EVEN-TEMPERED", "STIMULATING", "METICULOUS", "DETERMINED"],
+     "mapping": ["S", "I", "C", "D"]},
+    {"most": ["TIMID", "DEMANDING", "PATIENT", "CAPTIVATING"],
+     "least": ["TIMID", "DEMANDING", "PATIENT", "CAPTIVATING"],
+     "mapping": ["C", "D", "S", "I"]},
+    {"most": ["CONSCIENTIOUS", "COMPANIONABLE", "KIND", "SELF-RELIANT"],
+     "least": ["CONSCIENTIOUS", "COMPANIONABLE", "KIND", "SELF-RELIANT"],
+     "mapping": ["C", "I", "S", "D"]},
+    {"most": ["AGREEABLE", "SELF-CONTROLLED", "PLAYFUL", "PERSISTENT"],
+     "least": ["AGREEABLE", "SELF-CONTROLLED", "PLAYFUL", "PERSISTENT"],
+     "mapping": ["C", "S", "I", "D"]},
+    {"most": ["HIGH-SPIRITED", "TALKATIVE", "GOOD-NATURED", "CONSERVATIVE"],
+     "least": ["HIGH-SPIRITED", "TALKATIVE", "GOOD-NATURED", "CONSERVATIVE"],
+     "mapping": ["D", "I", "S", "C"]},
+    {"most": ["CONTENTED", "IMPATIENT", "CONVINCING", "RESIGNED"],
+     "least": ["CONTENTED", "IMPATIENT", "CONVINCING", "RESIGNED"],
+     "mapping": ["S", "D", "I", "C"]},
+    {"most": ["RESPECTFUL", "GOOD MIXER", "AGGRESSIVE", "GENTLE"],
+     "least": ["RESPECTFUL", "GOOD MIXER", "AGGRESSIVE", "GENTLE"],
+     "mapping": ["C", "I", "D", "S"]},
+    {"most": ["POISED", "CONVENTIONAL", "TAKES RISKS", "ACCOMMODATING"],
+     "least": ["POISED", "CONVENTIONAL", "TAKES RISKS", "ACCOMMODATING"],
+     "mapping": ["I", "C", "D", "S"]},
+    {"most": ["CONFIDENT", "COOPERATIVE", "ARGUMENTATIVE", "RELAXED"],
+     "least": ["CONFIDENT", "COOPERATIVE", "ARGUMENTATIVE", "RELAXED"],
+     "mapping": ["I", "C", "D", "S"]},
+    {"most": ["RESTLESS", "WELL-DISCIPLINED", "INSPIRING", "CONSIDERATE"],
+     "least": ["RESTLESS", "WELL-DISCIPLINED", "INSPIRING", "CONSIDERATE"],
+     "mapping": ["D", "C", "I", "S"]},
+    {"most": ["DIPLOMATIC", "COURAGEOUS", "SYMPATHETIC", "OPTIMISTIC"],
+     "least": ["DIPLOMATIC", "COURAGEOUS", "SYMPATHETIC", "OPTIMISTIC"],
+     "mapping": ["C", "D", "S", "I"]},
+    {"most": ["CHARMING", "POSITIVE", "LENIENT", "EXACTING"],
+     "least": ["CHARMING", "POSITIVE", "LENIENT", "EXACTING"],
+     "mapping": ["I", "D", "S", "C"]},
+    {"most": ["ADVENTUROUS", "ENTHUSIASTIC", "GOES-BY-THE-BOOK", "LOYAL"],
+     "least": ["ADVENTUROUS", "ENTHUSIASTIC", "GOES-BY-THE-BOOK", "LOYAL"],
+     "mapping": ["D", "I", "C", "S"]},
+    {"most": ["HUMBLE", "GOOD LISTENER", "ENTERTAINING", "WILL POWER"],
+     "least": ["HUMBLE", "GOOD LISTENER", "ENTERTAINING", "WILL POWER"],
+     "mapping": ["C", "S", "I", "D"]},
+    {"most": ["FUN-LOVING", "OBEDIENT", "TACTFUL", "COMPETITIVE"],
+     "least": ["FUN-LOVING", "OBEDIENT", "TACTFUL", "COMPETITIVE"],
+     "mapping": ["I", "S", "C", "D"]},
+    {"most": ["CAUTIOUS", "NEIGHBORLY", "VIGOROUS", "PERSUASIVE"],
+     "least": ["CAUTIOUS", "NEIGHBORLY", "VIGOROUS", "PERSUASIVE"],
+     "mapping": ["C", "S", "D", "I"]},
+    {"most": ["RESERVED", "OUTSPOKEN", "STRICT", "ELOQUENT"],
+     "least": ["RESERVED", "OUTSPOKEN", "STRICT", "ELOQUENT"],
+     "mapping": ["S", "D", "C", "I"]},
+    {"most": ["OBLIGING", "ANIMATED", "DECISIVE", "ACCURATE"],
+     "least": ["OBLIGING", "ANIMATED", "DECISIVE", "ACCURATE"],
+     "mapping": ["S", "I", "D", "C"]},
+    {"most": ["ASSERTIVE", "SOCIABLE", "STEADY", "ORDERLY"],
+     "least": ["ASSERTIVE", "SOCIABLE", "STEADY", "ORDERLY"],
+     "mapping": ["D", "I", "S", "C"]},
+    {"most": ["OUTGOING", "BOLD", "MODERATE", "PERFECTIONIST"],
+     "least": ["OUTGOING", "BOLD", "MODERATE", "PERFECTIONIST"],
+     "mapping": ["I", "D", "S", "C"]}
+]
+
+
+# ---------- Scoring ----------
+def compile_questions(questions):
+    """Compile questions into option->index lookups and a (questions x 4) trait matrix
+
+    trait_matrix[q, option] is the index into TRAITS of that option's trait.
+    """
+    most_index = [{opt: idx for idx, opt in enumerate(q["most"])} for q in questions]
+    least_index = [{opt: idx for idx, opt in enumerate(q["least"])} for q in questions]
+    trait_matrix = np.array([[TRAITS.index(t) for t in q["mapping"]] for q in questions])
+    return most_index, least_index, trait_matrix
+
+
+MOST_INDEX, LEAST_INDEX, TRAIT_MATRIX = compile_questions(questions)
+
+
+# ---------- Question model for the questionnaire UI ----------
+# choices[excluded] is (options, {option: position}) for a radio with the
+# other column's choice removed; choices[None] is the full option list.
+Question = namedtuple("Question", ["most_choices", "least_choices"])
+
+
+def option_choices(options, excluded_by):
+    """Radio option tuples (and option->position dicts) for every possible exclusion"""
+    choices = {None: (tuple(options), MappingProxyType({opt: idx for idx, opt in enumerate(options)}))}
+    for excluded in excluded_by:
+        remaining = tuple(opt for opt in options if opt != excluded)
+        choices[excluded] = (remaining, MappingProxyType({opt: idx for idx, opt in enumerate(remaining)}))
+    return MappingProxyType(choices)
+
+
+def build_question_model(questions):
+    """Immutable per-question lookups, built once so reruns do no list scans"""
+    return tuple(
+        Question(
+            # MOST hides the current LEAST choice and vice versa
+            most_choices=option_choices(q["most"], q["least"]),
+            least_choices=option_choices(q["least"], q["most"]),
+        )
+        for q in questions
+    )
+
+
+QUESTION_MODEL = build_question_model(questions)
+
+
+def encode_responses(most_responses, least_responses):
+    """Turn one respondent's chosen option names into MOST and LEAST index arrays"""
+    most_idx = np.array([MOST_INDEX[i][opt] for i, opt in enumerate(most_responses)])
+    least_idx = np.array([LEAST_INDEX[i][opt] for i, opt in enumerate(least_responses)])
+    return most_idx, least_idx
+
+
+def encode_answer_table(most_names, least_names):
+    """encode_responses for (N, questions) arrays of option names; unknown options become -1"""
+    most_names = np.asarray(most_names, dtype=object)
+    least_names = np.asarray(least_names, dtype=object)
+    most_idx = np.full(most_names.shape, -1)
+    least_idx = np.full(least_names.shape, -1)
+    for i, q in enumerate(questions):
+        for idx, opt in enumerate(q["most"]):
+            most_idx[most_names[:, i] == opt, i] = idx
+        for idx, opt in enumerate(q["least"]):
+            least_idx[least_names[:, i] == opt, i] = idx
+    return most_idx, least_idx
+
+
+def count_traits(answer_idx, trait_matrix=TRAIT_MATRIX):
+    """Per-respondent trait counts for an (N, questions) array of option indices"""
+    answer_idx = np.atleast_2d(answer_idx)
+    n, n_questions = answer_idx.shape
+    traits = trait_matrix[np.arange(n_questions), answer_idx]
+    # Offset each respondent's traits into its own block of 4 and count in one pass
+    flat = (traits + len(TRAITS) * np.arange(n)[:, None]).ravel()
+    return np.bincount(flat, minlength=n * len(TRAITS)).reshape(n, len(TRAITS))
+
+
+def score_batch(most_idx, least_idx, trait_matrix=TRAIT_MATRIX):
+    """Score N respondents at once; returns (N, 4) MOST, LEAST and COMPOSITE arrays"""
+    most = count_traits(most_idx, trait_matrix)
+    least = count_traits(least_idx, trait_matrix)
+    return most, least, most - least
+
+
+def answer_traits(answer_idx, trait_matrix=TRAIT_MATRIX):
+    """Trait letter of each chosen option for one respondent"""
+    traits = trait_matrix[np.arange(len(answer_idx)), answer_idx]
+    return [TRAITS[t] for t in traits]
+
+
+def scores_dict(row):
+    """{"D": .., "I": .., "S": .., "C": ..} for one row of a score array"""
+    return {trait: int(v) for trait, v in zip(TRAITS, row)}
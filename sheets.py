@@ -0,0 +1,390 @@
+import atexit
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import gspread
+import requests
+import streamlit as st
+from google.auth.exceptions import RefreshError, TransportError
+from google.auth.transport.requests import Request
+from google.oauth2.service_account import Credentials
+
+import metrics
+from runtime import has_secret
+
+# ---------- Google Sheets connection ----------
+SHEET_ID = "1uHj7lwx-6vsWu48hn9vT-c3a3WW4GAhOsZDo4cbjoY8"
+
+SCOPES = [
+    'https://www.googleapis.com/auth/spreadsheets',
+    'https://www.googleapis.com/auth/drive'
+]
+
+# Refresh the access token this long before it actually expires
+TOKEN_REFRESH_MARGIN = timedelta(minutes=5)
+# Probe the spreadsheet if the handle has been idle for longer than this
+HEALTH_CHECK_INTERVAL = 600
+
+
+def load_credentials():
+    """Load service account credentials - works with both local files and Streamlit secrets"""
+    # Try Streamlit secrets first (for cloud deployment)
+    if has_secret('gcp_service_account'):
+        creds_dict = dict(st.secrets['gcp_service_account'])
+        return Credentials.from_service_account_info(creds_dict, scopes=SCOPES)
+    # Try credentials.json file (for local development)
+    if os.path.exists('credentials.json'):
+        return Credentials.from_service_account_file('credentials.json', scopes=SCOPES)
+    return None
+
+
+def is_reconnectable(error):
+    """True for auth or transport failures that a fresh connection can fix"""
+    if isinstance(error, (RefreshError, TransportError,
+                          requests.exceptions.ConnectionError,
+                          requests.exceptions.Timeout)):
+        return True
+    if isinstance(error, gspread.exceptions.APIError):
+        response = getattr(error, "response", None)
+        return getattr(response, "status_code", None) in (401, 403)
+    return False
+
+
+class SheetConnection:
+    """Process-wide handle on the response worksheet, shared by all sessions"""
+
+    def __init__(self, sheet_id=SHEET_ID):
+        self.sheet_id = sheet_id
+        self._lock = threading.RLock()
+        self._creds = None
+        self._worksheet = None
+        self._last_used = 0.0
+
+    def _connect(self):
+        creds = load_credentials()
+        if creds is None:
+            raise RuntimeError("No Google Sheets credentials found.")
+        client = gspread.authorize(creds)
+        self._worksheet = client.open_by_key(self.sheet_id).sheet1
+        self._creds = creds
+        self._last_used = time.monotonic()
+
+    def _token_expiring(self):
+        # google-auth stores expiry as a naive UTC datetime
+        expiry = self._creds.expiry
+        if not self._creds.token or expiry is None:
+            return True
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        return expiry - now < TOKEN_REFRESH_MARGIN
+
+    def _ensure_healthy(self):
+        if self._worksheet is None:
+            self._connect()
+            return
+        if self._token_expiring():
+            self._creds.refresh(Request())
+        if time.monotonic() - self._last_used > HEALTH_CHECK_INTERVAL:
+            self._worksheet.spreadsheet.fetch_sheet_metadata({"fields": "spreadsheetId"})
+        self._last_used = time.monotonic()
+
+    def reset(self):
+        """Drop the cached handle so the next call reconnects"""
+        with self._lock:
+            self._creds = None
+            self._worksheet = None
+
+    def worksheet(self):
+        """Return a healthy worksheet handle, connecting or refreshing as needed"""
+        with self._lock:
+            try:
+                self._ensure_healthy()
+            except Exception as e:
+                if not is_reconnectable(e):
+                    raise
+                self.reset()
+                self._connect()
+            return self._worksheet
+
+    def run(self, operation):
+        """Call operation(worksheet), reconnecting once on auth or transport failures"""
+        worksheet = self.worksheet()
+        try:
+            return operation(worksheet)
+        except Exception as e:
+            if not is_reconnectable(e):
+                raise
+            self.reset()
+            return operation(self.worksheet())
+
+
+@st.cache_resource
+def get_sheet_connection():
+    """Shared SheetConnection for the whole Streamlit process"""
+    return SheetConnection()
+
+
+# ---------- Write quota ----------
+# Sheets allows 60 write requests per minute per user per project; stay under it
+WRITES_PER_MINUTE = int(os.getenv("SHEETS_WRITES_PER_MINUTE", "50"))
+WRITE_BURST = int(os.getenv("SHEETS_WRITE_BURST", "5"))
+
+
+class TokenBucket:
+    """Token bucket limiting how fast API requests are made: per_minute on average, burst at once"""
+
+    def __init__(self, per_minute=WRITES_PER_MINUTE, burst=WRITE_BURST):
+        self.rate = per_minute / 60
+        self.capacity = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.waiting = 0
+        self.throttled = 0
+        self.throttle_seconds = 0.0
+
+    def acquire(self):
+        """Take a token, sleeping until one is available; returns seconds waited"""
+        waited = 0.0
+        with self._lock:
+            self.waiting += 1
+        try:
+            while True:
+                with self._lock:
+                    now = time.monotonic()
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        if waited:
+                            self.throttled += 1
+                            self.throttle_seconds += waited
+                        return waited
+                    wait = (1 - self._tokens) / self.rate
+                time.sleep(wait)
+                waited += wait
+        finally:
+            with self._lock:
+                self.waiting -= 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "waiting": self.waiting,
+                "throttled": self.throttled,
+                "throttle_seconds": round(self.throttle_seconds, 3),
+            }
+
+
+@st.cache_resource
+def get_write_limiter():
+    """Write TokenBucket shared by every session in the process"""
+    return TokenBucket()
+
+
+def api_status(error):
+    """HTTP status of a Sheets API error, or None for anything else"""
+    if isinstance(error, gspread.exceptions.APIError):
+        return getattr(getattr(error, "response", None), "status_code", None)
+    return None
+
+
+def retry_after(error):
+    """Seconds the API asked us to wait before retrying, if it said"""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(failures):
+    """Exponential backoff with jitter, so writers that failed together retry apart"""
+    delay = min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** (failures - 1))
+    return random.uniform(delay / 2, delay)
+
+
+# ---------- Write-behind queue ----------
+SPOOL_PATH = os.getenv("SHEETS_SPOOL_PATH", "sheets_spool.db")
+# Flush once this many rows are pending, or once the oldest has waited FLUSH_INTERVAL_MS
+BATCH_ROWS = int(os.getenv("SHEETS_BATCH_ROWS", "20"))
+FLUSH_INTERVAL_MS = int(os.getenv("SHEETS_FLUSH_INTERVAL_MS", "2000"))
+# Back off between failed flushes, doubling up to the cap
+RETRY_BASE_SECONDS = 2
+RETRY_MAX_SECONDS = 300
+
+
+class SheetWriter:
+    """Background writer that spools rows locally and appends them to the sheet in batches
+
+    Rows are committed to an append-only SQLite spool before submit() returns,
+    so anything not yet in the sheet is replayed after a crash or outage. A
+    replication cursor can be committed in the same transaction as the rows
+    it covers (see storage.ReplicatedStorage).
+    """
+
+    def __init__(self, connection, spool_path=SPOOL_PATH,
+                 batch_rows=BATCH_ROWS, flush_interval_ms=FLUSH_INTERVAL_MS, limiter=None):
+        self.connection = connection
+        self.limiter = limiter or TokenBucket()
+        self.batch_rows = batch_rows
+        self.flush_interval = flush_interval_ms / 1000
+        self._db = sqlite3.connect(spool_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS pending ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, row TEXT NOT NULL, queued_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS cursors (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self._db.commit()
+        self._db_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self.last_error = None
+        self._counters_lock = threading.Lock()
+        self._counters = {
+            "rows_written": 0,
+            "batches_written": 0,
+            "quota_errors": 0,
+            "server_errors": 0,
+            "other_errors": 0,
+        }
+        self._thread = threading.Thread(target=self._run, name="sheet-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, row):
+        """Spool one row for appending; returns once it is durable locally"""
+        self.submit_many([row])
+
+    def submit_many(self, rows, cursor=None):
+        """Spool rows in one transaction, optionally moving the replication cursor with them"""
+        now = time.time()
+        with self._db_lock:
+            with self._db:
+                self._db.executemany(
+                    "INSERT INTO pending (row, queued_at) VALUES (?, ?)",
+                    [(json.dumps(row), now) for row in rows],
+                )
+                if cursor is not None:
+                    self._set_cursor(cursor)
+        self._wake.set()
+
+    def _set_cursor(self, value):
+        self._db.execute("INSERT OR REPLACE INTO cursors (name, value) VALUES ('replicated_upto', ?)", (value,))
+
+    def replicated_upto(self):
+        """Primary cursor of the last record spooled from it, or None if never set"""
+        with self._db_lock:
+            row = self._db.execute("SELECT value FROM cursors WHERE name = 'replicated_upto'").fetchone()
+        return None if row is None else row[0]
+
+    def set_replicated_upto(self, value):
+        with self._db_lock, self._db:
+            self._set_cursor(value)
+
+    def pending(self):
+        """Number of rows spooled but not yet in the sheet"""
+        with self._db_lock:
+            return self._db.execute("SELECT COUNT(*) FROM pending").fetchone()[0]
+
+    def _oldest_age(self):
+        with self._db_lock:
+            oldest = self._db.execute("SELECT MIN(queued_at) FROM pending").fetchone()[0]
+        return None if oldest is None else time.time() - oldest
+
+    def _take_batch(self):
+        with self._db_lock:
+            return self._db.execute(
+                "SELECT id, row FROM pending ORDER BY id LIMIT ?", (self.batch_rows,)
+            ).fetchall()
+
+    def flush(self):
+        """Append the next batch of spooled rows; returns how many were written"""
+        with self._flush_lock:
+            batch = self._take_batch()
+            if not batch:
+                return 0
+            rows = [json.loads(row) for _, row in batch]
+            with metrics.span("sheets_throttle"):
+                self.limiter.acquire()
+            with metrics.span("sheets_append", rows=len(rows)):
+                self.connection.run(lambda ws: ws.append_rows(rows))
+            with self._db_lock:
+                self._db.executemany("DELETE FROM pending WHERE id = ?", [(row_id,) for row_id, _ in batch])
+                self._db.commit()
+            self._count(rows_written=len(batch), batches_written=1)
+            return len(batch)
+
+    def _count(self, **increments):
+        with self._counters_lock:
+            for name, amount in increments.items():
+                self._counters[name] += amount
+
+    def _record_failure(self, error):
+        status = api_status(error)
+        if status == 429:
+            self._count(quota_errors=1)
+        elif status is not None and status >= 500:
+            self._count(server_errors=1)
+        else:
+            self._count(other_errors=1)
+        self.last_error = str(error)
+
+    def stats(self):
+        """Queue depth plus write, throttle and error counters"""
+        with self._counters_lock:
+            counters = dict(self._counters)
+        return {
+            "queue_depth": self.pending(),
+            **counters,
+            **self.limiter.stats(),
+            "last_error": self.last_error,
+        }
+
+    def _run(self):
+        failures = 0
+        while not self._stopped.is_set():
+            age = self._oldest_age()
+            if age is None:
+                self._wake.wait()
+                self._wake.clear()
+                continue
+            if self.pending() < self.batch_rows and age < self.flush_interval:
+                self._wake.wait(self.flush_interval - age)
+                self._wake.clear()
+                continue
+            try:
+                self.flush()
+                self.last_error = None
+                failures = 0
+            except Exception as e:
+                # Rows stay in the spool; back off, and never sooner than a 429's Retry-After
+                self._record_failure(e)
+                failures += 1
+                delay = backoff_delay(failures)
+                if api_status(e) == 429:
+                    delay = max(delay, retry_after(e) or 0)
+                self._stopped.wait(delay)
+
+    def stop(self, timeout=10):
+        """Try to drain the spool, then stop the worker; leftovers are replayed next start"""
+        deadline = time.monotonic() + timeout
+        while self.pending() and time.monotonic() < deadline:
+            try:
+                self.flush()
+            except Exception:
+                break
+        self._stopped.set()
+        self._wake.set()
+
+
+@st.cache_resource
+def get_sheet_writer():
+    """Shared SheetWriter for the whole Streamlit process"""
+    writer = SheetWriter(get_sheet_connection(), limiter=get_write_limiter())
+    atexit.register(writer.stop)
+    return writer
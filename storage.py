@@ -0,0 +1,369 @@
+import csv
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+import streamlit as st
+
+logger = logging.getLogger(__name__)
+
+# ---------- Response record layout ----------
+# A record is a dict with these keys; sheet and CSV rows use the same order:
+# timestamp, name, email, phone, the 12 scores, then MOST/LEAST answer pairs
+N_QUESTIONS = 24
+SCORE_COLUMNS = [
+    "most_d", "most_i", "most_s", "most_c",
+    "least_d", "least_i", "least_s", "least_c",
+    "comp_d", "comp_i", "comp_s", "comp_c",
+]
+ANSWER_COLUMNS = [f"q{i + 1}_{kind}" for i in range(N_QUESTIONS) for kind in ("most", "least")]
+RECORD_COLUMNS = ["submitted_at", "name", "email", "phone"] + SCORE_COLUMNS + ANSWER_COLUMNS
+FIRST_SCORE_COL = RECORD_COLUMNS.index(SCORE_COLUMNS[0])
+FIRST_ANSWER_COL = RECORD_COLUMNS.index(ANSWER_COLUMNS[0])
+
+# Submissions are timestamped in Malaysia Time (MYT, UTC+8)
+MYT = timezone(timedelta(hours=8))
+
+
+def make_record(data):
+    """Complete a submission dict into a record: timestamp it and fill optional fields"""
+    record = {col: data.get(col, "") for col in RECORD_COLUMNS}
+    if not record["submitted_at"]:
+        record["submitted_at"] = datetime.now(MYT).strftime("%Y-%m-%d %H:%M:%S")
+    return record
+
+
+def record_to_row(record):
+    return [record.get(col, "") for col in RECORD_COLUMNS]
+
+
+def row_to_record(row):
+    padded = list(row) + [""] * (len(RECORD_COLUMNS) - len(row))
+    record = dict(zip(RECORD_COLUMNS, padded))
+    for col in SCORE_COLUMNS:
+        try:
+            record[col] = int(record[col])
+        except (TypeError, ValueError):
+            pass
+    return record
+
+
+def is_header_row(row):
+    """True if a sheet row has no numeric score where the first score belongs"""
+    cell = row[FIRST_SCORE_COL] if len(row) > FIRST_SCORE_COL else ""
+    return not str(cell).strip().lstrip("+-").isdigit()
+
+
+# ---------- Storage backends ----------
+class Storage:
+    """Somewhere submissions are kept"""
+
+    def append(self, record):
+        """Save one record"""
+        raise NotImplementedError
+
+    def records(self):
+        """All saved records, oldest first"""
+        raise NotImplementedError
+
+    def records_since(self, cursor):
+        """(records added after cursor, new cursor); a cursor of 0 means from the start"""
+        records = self.records()
+        return records[cursor:], len(records)
+
+    # A replica of a primary store keeps the primary's records_since cursor of
+    # the last record it took, so copying resumes where it stopped
+    def replicated_upto(self):
+        """Primary cursor this store has replicated up to, or None if it has never been set"""
+        return getattr(self, "_replicated_upto", None)
+
+    def replicate(self, records, cursor):
+        """Take records copied from a primary, then advance the cursor to cursor"""
+        for record in records:
+            self.append(record)
+        self._replicated_upto = cursor
+
+    def close(self):
+        pass
+
+
+class MemoryStorage(Storage):
+    """Records held in a list; for tests and throwaway runs"""
+
+    def __init__(self):
+        self._records = []
+        self._lock = threading.Lock()
+
+    def append(self, record):
+        with self._lock:
+            self._records.append(dict(record))
+
+    def records(self):
+        with self._lock:
+            return [dict(r) for r in self._records]
+
+
+class CSVStorage(Storage):
+    """Records appended to a CSV file in the sheet's column order"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def append(self, record):
+        with self._lock:
+            new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+            with open(self.path, "a", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                if new_file:
+                    writer.writerow(RECORD_COLUMNS)
+                writer.writerow(record_to_row(record))
+
+    def records(self):
+        if not os.path.exists(self.path):
+            return []
+        with self._lock, open(self.path, newline="", encoding="utf-8") as f:
+            rows = list(csv.reader(f))
+        if rows and is_header_row(rows[0]):
+            rows = rows[1:]
+        return [row_to_record(row) for row in rows if any(row)]
+
+
+class SQLiteStorage(Storage):
+    """Records in a local SQLite database in WAL mode; the durable primary store"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        columns = ", ".join(
+            f"{col} INTEGER" if col in SCORE_COLUMNS else f"{col} TEXT" for col in RECORD_COLUMNS
+        )
+        self._db.execute(f"CREATE TABLE IF NOT EXISTS responses (id INTEGER PRIMARY KEY AUTOINCREMENT, {columns})")
+        self._db.commit()
+        self._insert = (
+            f"INSERT INTO responses ({', '.join(RECORD_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(RECORD_COLUMNS))})"
+        )
+
+    def append(self, record):
+        with self._lock:
+            self._db.execute(self._insert, record_to_row(record))
+            self._db.commit()
+
+    def records(self):
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT {', '.join(RECORD_COLUMNS)} FROM responses ORDER BY id"
+            ).fetchall()
+        return [dict(zip(RECORD_COLUMNS, row)) for row in rows]
+
+    def records_since(self, cursor):
+        # The cursor is the last row id seen, so only new rows are read
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT id, {', '.join(RECORD_COLUMNS)} FROM responses WHERE id > ? ORDER BY id", (cursor,)
+            ).fetchall()
+        if not rows:
+            return [], cursor
+        return [dict(zip(RECORD_COLUMNS, row[1:])) for row in rows], rows[-1][0]
+
+    def rows(self):
+        """(row ids, rows in the sheet's column order), oldest first"""
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT id, {', '.join(RECORD_COLUMNS)} FROM responses ORDER BY id"
+            ).fetchall()
+        return [row[0] for row in rows], [list(row[1:]) for row in rows]
+
+    def update_scores(self, updates):
+        """Overwrite stored scores: updates is [(row id, scores in SCORE_COLUMNS order)]"""
+        statement = f"UPDATE responses SET {', '.join(f'{col} = ?' for col in SCORE_COLUMNS)} WHERE id = ?"
+        with self._lock:
+            self._db.executemany(statement, [(*scores, row_id) for row_id, scores in updates])
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class GoogleSheetsStorage(Storage):
+    """The response Google Sheet; appends go through the spooled background writer"""
+
+    def __init__(self, writer, connection):
+        self.writer = writer
+        self.connection = connection
+
+    def append(self, record):
+        self.writer.submit(record_to_row(record))
+
+    def replicated_upto(self):
+        return self.writer.replicated_upto()
+
+    def replicate(self, records, cursor):
+        # Rows and cursor are committed to the spool together, so nothing is lost or sent twice
+        self.writer.submit_many([record_to_row(record) for record in records], cursor)
+
+    def records(self):
+        rows = self.connection.run(lambda ws: ws.get_all_values())
+        if rows and is_header_row(rows[0]):
+            rows = rows[1:]
+        return [row_to_record(row) for row in rows if any(row)]
+
+
+class ReplicatedStorage(Storage):
+    """Writes to a primary store, then copies new primary records to each replica
+
+    Each replica keeps the primary's records_since cursor of what it has
+    taken, so a record whose hand-off failed, or that was saved just before
+    the process died, is copied on the next append or at the next start. A
+    replica failing never fails the submission; the primary already has it.
+    Replicas whose cursor was never set (e.g. a sheet filled before cursors
+    existed) start from the primary's current end rather than copying history.
+    """
+
+    def __init__(self, primary, replicas):
+        self.primary = primary
+        self.replicas = replicas
+        self._sync_lock = threading.Lock()
+        for replica in replicas:
+            if replica.replicated_upto() is None:
+                replica.replicate([], primary.records_since(0)[1])
+        self.sync()
+
+    def sync(self):
+        """Copy primary records each replica has not taken yet"""
+        with self._sync_lock:
+            for replica in self.replicas:
+                try:
+                    records, cursor = self.primary.records_since(replica.replicated_upto())
+                    if records:
+                        replica.replicate(records, cursor)
+                except Exception:
+                    logger.exception("Could not replicate responses to %s", type(replica).__name__)
+
+    def append(self, record):
+        self.primary.append(record)
+        self.sync()
+
+    def records(self):
+        return self.primary.records()
+
+    def records_since(self, cursor):
+        return self.primary.records_since(cursor)
+
+    def close(self):
+        self.primary.close()
+
+
+# "sqlite+sheets" keeps SQLite as the primary and replicates to the sheet;
+# "sqlite", "csv", "memory" and "sheets" use a single backend
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "sqlite+sheets")
+STORAGE_PATH = os.getenv("STORAGE_PATH", "responses.db")
+CSV_STORAGE_PATH = os.getenv("CSV_STORAGE_PATH", "responses.csv")
+
+
+def create_storage(backend=STORAGE_BACKEND):
+    """Build the storage named by backend"""
+    def sheets_storage():
+        import sheets
+        return GoogleSheetsStorage(sheets.get_sheet_writer(), sheets.get_sheet_connection())
+
+    if backend == "sqlite+sheets":
+        return ReplicatedStorage(SQLiteStorage(STORAGE_PATH), [sheets_storage()])
+    if backend == "sqlite":
+        return SQLiteStorage(STORAGE_PATH)
+    if backend == "csv":
+        return CSVStorage(CSV_STORAGE_PATH)
+    if backend == "memory":
+        return MemoryStorage()
+    if backend == "sheets":
+        return sheets_storage()
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+
+@st.cache_resource
+def get_storage():
+    """Shared storage for the whole Streamlit process"""
+    return create_storage()
+
+
+# ---------- Submission results ----------
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "200"))
+
+
+def submission_id(data):
+    """Stable ID for a submission: the respondent's identity plus their scores and answers"""
+    identity = [
+        str(data.get("name", "")).strip(),
+        str(data.get("email", "")).strip().lower(),
+        str(data.get("phone", "")).strip(),
+    ]
+    content = [data.get(col, "") for col in SCORE_COLUMNS + ANSWER_COLUMNS]
+    blob = json.dumps([identity, content], default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """Bounded, process-wide memo of submission results keyed by submission ID
+
+    Results are dicts filled in step by step (saved, chart, email), so a
+    repeated or interrupted submission only redoes the steps that never finished.
+    Each step runs once per submission ID for as long as its result stays
+    cached; a submission repeated after its result was evicted runs again.
+    """
+
+    def __init__(self, max_entries=RESULT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        # submission_id -> [lock, holders and waiters]; dropped when nobody uses it
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def lock(self, submission_id):
+        """Hold a submission's lock while it is processed
+
+        The lock lives as long as anyone holds or waits for it, independent
+        of the cached result, so eviction cannot let two callers in at once.
+        """
+        with self._lock:
+            entry = self._locks.setdefault(submission_id, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._locks[submission_id]
+
+    def get(self, submission_id):
+        with self._lock:
+            result = self._entries.get(submission_id)
+            if result is not None:
+                self._entries.move_to_end(submission_id)
+            return result
+
+    def put(self, submission_id, result):
+        with self._lock:
+            self._entries[submission_id] = result
+            self._entries.move_to_end(submission_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+@st.cache_resource
+def get_result_cache():
+    """Shared ResultCache for the whole Streamlit process"""
+    return ResultCache()
@@ -0,0 +1,54 @@
+"""SMTPSession and EmailOutbox against fakes.SMTPSink, which requires AUTH like Gmail"""
+import time
+from email.message import EmailMessage
+
+import pytest
+
+from fakes import SMTPSink
+from mailer import EmailOutbox, SMTPSession
+
+
+@pytest.fixture
+def sink():
+    server = SMTPSink(port=0, auth=True).start()
+    yield server
+    server.stop()
+
+
+def make_session(sink, password="app-password"):
+    return SMTPSession("sender@example.com", password, host="127.0.0.1", port=sink.port, starttls=False)
+
+
+def message(to="respondent@example.com"):
+    msg = EmailMessage()
+    msg["From"] = "sender@example.com"
+    msg["To"] = to
+    msg["Subject"] = "Your DISC Assessment Results"
+    msg.set_content("Results attached")
+    return msg
+
+
+def test_session_logs_in_before_sending(sink):
+    session = make_session(sink)
+    session.send(message())
+    session.send(message("second@example.com"))
+    session.close()
+
+    # One login for the reused connection, then both messages
+    assert sink.logins == ["sender@example.com"]
+    assert [recipients for _, recipients, _ in sink.messages] == [
+        ["<respondent@example.com>"], ["<second@example.com>"]
+    ]
+
+
+def test_outbox_delivers_through_an_authenticated_session(sink):
+    outbox = EmailOutbox(make_session(sink))
+    job_id = outbox.submit(message())
+    deadline = time.monotonic() + 10
+    while outbox.status(job_id)["state"] not in ("sent", "failed"):
+        assert time.monotonic() < deadline, outbox.status(job_id)
+        time.sleep(0.02)
+
+    assert outbox.status(job_id)["state"] == "sent"
+    assert sink.logins == ["sender@example.com"]
+    assert len(sink.messages) == 1
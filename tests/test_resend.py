@@ -0,0 +1,47 @@
+"""A re-send campaign end to end against fakes.SMTPSink, which requires AUTH like Gmail"""
+import pytest
+
+from fakes import SMTPSink
+from mailer import SMTPSession
+from resend import Checkpoint, Pacer, SessionPool, deliver, select_submissions
+from storage import SCORE_COLUMNS, make_record
+
+
+@pytest.fixture
+def sink():
+    server = SMTPSink(port=0, auth=True).start()
+    yield server
+    server.stop()
+
+
+def sample_records():
+    records = []
+    for i in range(3):
+        data = {"submitted_at": f"2026-10-0{i + 1} 09:00:00", "name": f"Respondent {i}",
+                "email": f"respondent{i}@example.com"}
+        for col in SCORE_COLUMNS:
+            data[col] = i + 1 if not col.startswith("comp_") else -i
+        records.append(make_record(data))
+    return records
+
+
+def test_campaign_logs_in_and_checkpoints_sends(sink, tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.db"))
+    records = sample_records()
+    selected = select_submissions(records, checkpoint.states("test"))
+    pool = SessionPool(1, lambda: SMTPSession("sender@example.com", "app-password",
+                                              host="127.0.0.1", port=sink.port, starttls=False))
+    try:
+        states = [deliver(sub_id, record, "test", checkpoint, pool, Pacer(None), "sender@example.com")
+                  for sub_id, record in selected]
+    finally:
+        pool.close()
+
+    assert states == ["sent"] * 3
+    assert sink.logins == ["sender@example.com"]
+    assert sorted(r for _, recipients, _ in sink.messages for r in recipients) == [
+        f"<respondent{i}@example.com>" for i in range(3)
+    ]
+    assert checkpoint.summary("test") == {"sent": 3}
+    # A rerun of the same campaign finds nothing left to send
+    assert select_submissions(records, checkpoint.states("test")) == []
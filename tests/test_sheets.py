@@ -0,0 +1,72 @@
+"""SheetWriter against fakes.FakeSheetConnection: no network, quota and server errors injected"""
+import time
+
+import pytest
+
+import sheets
+from fakes import FakeSheetConnection
+from sheets import SheetWriter, TokenBucket
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    """Retry failed flushes almost at once, so only Retry-After imposes a wait"""
+    monkeypatch.setattr(sheets, "backoff_delay", lambda failures: 0.01)
+
+
+def make_writer(fake, batch_rows=3):
+    # A limiter far above the fake's quota, so the writer runs into 429s
+    return SheetWriter(fake, spool_path=":memory:", batch_rows=batch_rows, flush_interval_ms=10,
+                       limiter=TokenBucket(per_minute=60000, burst=1000))
+
+
+def drain(writer, timeout=30):
+    """Wait for the spool to empty, then stop the writer and its thread"""
+    deadline = time.monotonic() + timeout
+    while writer.pending():
+        assert time.monotonic() < deadline, f"{writer.pending()} rows still spooled"
+        time.sleep(0.02)
+    writer.stop()
+    writer._thread.join(timeout)
+
+
+def test_rows_survive_quota_and_server_errors(no_backoff):
+    fake = FakeSheetConnection(writes_per_minute=2, quota_window=0.3, error_rate=0.2, seed=7)
+    writer = make_writer(fake)
+    rows = [[f"respondent {i}", i] for i in range(20)]
+    for row in rows:
+        writer.submit(row)
+    drain(writer)
+
+    assert fake.quota_errors and fake.server_errors
+    assert fake.rows() == rows
+
+
+def test_retry_waits_for_retry_after(no_backoff):
+    fake = FakeSheetConnection(writes_per_minute=1, quota_window=0.5)
+    writer = make_writer(fake, batch_rows=1)
+    for i in range(4):
+        writer.submit([i])
+    drain(writer)
+
+    assert fake.quota_errors
+    for (failed_at, outcome, retry_after), (retried_at, _, _) in zip(fake.log, fake.log[1:]):
+        if outcome == "quota":
+            assert retried_at - failed_at >= retry_after
+
+
+def test_stats_match_the_fake(no_backoff):
+    fake = FakeSheetConnection(writes_per_minute=2, quota_window=0.3, error_rate=0.2, seed=11)
+    writer = make_writer(fake, batch_rows=2)
+    for i in range(10):
+        writer.submit([i])
+    drain(writer)
+
+    stats = writer.stats()
+    successes = sum(1 for _, outcome, _ in fake.log if outcome == "ok")
+    assert stats["queue_depth"] == 0
+    assert stats["rows_written"] == len(fake.rows()) == 10
+    assert stats["batches_written"] == successes
+    assert stats["quota_errors"] == fake.quota_errors
+    assert stats["server_errors"] == fake.server_errors
+    assert stats["other_errors"] == 0